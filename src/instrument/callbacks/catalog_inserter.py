@@ -0,0 +1,124 @@
+"""
+Buffered catalog inserts
+========================
+
+Insert RunEngine documents into the databroker catalog in bulk.
+
+Consecutive ``event`` documents (of the same descriptor) are grouped into
+one ``event_page`` document, written to the catalog with one (bulk) insert.
+A page is written when it has ``max_events`` events, before any other
+document, and whenever ``flush()`` is called.
+
+Configure with ``RUN_ENGINE: CATALOG_INSERT`` in ``iconfig.yml`` (see
+:func:`make_catalog_callback`).
+
+EXAMPLE::
+
+    inserter = BufferedInserter(cat.v1.insert, max_events=100)
+    RE.subscribe(
+        QueuedCallback(
+            inserter,
+            flush=inserter.flush,
+            flush_interval=0.5,
+            wait_for=["stop"],
+        )
+    )
+
+Run in a :class:`~instrument.callbacks.queued_callback.QueuedCallback`,
+pages are also written after ``flush_interval`` seconds, the RunEngine
+waits when the catalog falls behind (the queue is full), and each run is in
+the catalog when its ``stop`` document has been handled.
+
+.. autosummary::
+    :nosignatures:
+
+    ~BufferedInserter
+    ~make_catalog_callback
+"""
+
+__all__ = ["BufferedInserter", "make_catalog_callback"]
+
+import logging
+
+from event_model import pack_event_page
+
+from ..utils.config_loaders import iconfig
+from .queued_callback import DEFAULT_QUEUE_SIZE
+from .queued_callback import QueuedCallback
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+DEFAULT_FLUSH_INTERVAL = 0.5  # seconds
+DEFAULT_MAX_EVENTS = 100
+
+
+class BufferedInserter:
+    """
+    Group consecutive events into event pages, for the catalog.
+
+    .. autosummary::
+
+        ~flush
+
+    PARAMETERS
+
+    insert : callable
+        Called with each ``(name, doc)`` pair to store, such as
+        ``cat.v1.insert``.
+    max_events : int
+        Maximum number of events in one page.  Default: 100
+    """
+
+    def __init__(self, insert, *, max_events=DEFAULT_MAX_EVENTS):
+        """Nothing is buffered yet."""
+        self.insert = insert
+        self.max_events = max(1, max_events)
+        self._events = []
+
+    def __call__(self, name, doc):
+        """Buffer an event, or insert any other document (in order)."""
+        if name != "event":
+            self.flush()
+            self.insert(name, doc)
+            return
+        if len(self._events) > 0 and self._events[0]["descriptor"] != doc["descriptor"]:
+            self.flush()
+        self._events.append(doc)
+        if len(self._events) >= self.max_events:
+            self.flush()
+
+    def __repr__(self):
+        """Representation of this object."""
+        return f"<{self.__class__.__name__} buffered={len(self._events)}>"
+
+    def flush(self):
+        """Insert the buffered events as one event page."""
+        if len(self._events) == 0:
+            return
+        events, self._events = self._events, []
+        self.insert("event_page", pack_event_page(*events))
+
+
+def make_catalog_callback(insert):
+    """
+    Callback that inserts documents into the catalog, as configured.
+
+    ``insert`` (such as ``cat.v1.insert``), or (with ``BUFFERED: true``) a
+    ``QueuedCallback`` of a ``BufferedInserter`` that calls ``insert``.
+    """
+    config = iconfig.get("RUN_ENGINE", {}).get("CATALOG_INSERT") or {}
+    if not config.get("BUFFERED", False):
+        return insert
+    inserter = BufferedInserter(
+        insert,
+        max_events=config.get("PAGE_SIZE", DEFAULT_MAX_EVENTS),
+    )
+    return QueuedCallback(
+        inserter,
+        flush=inserter.flush,
+        flush_interval=config.get("FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL),
+        wait_for=["stop"],  # The run is in the catalog when RE() returns.
+        maxsize=config.get("QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+        name="catalog_inserter",
+    )
@@ -0,0 +1,198 @@
+"""
+Document consumers in worker processes
+======================================
+
+Run session callbacks in separate processes, which receive the RunEngine's
+documents from a local 0MQ proxy.
+
+Enable with ``RUN_ENGINE: ZMQ_PUBLISH: ENABLE: true`` in ``iconfig.yml``.
+The session then publishes its documents to the proxy (``PROXY_ADDRESS``),
+and starts (and supervises) the proxy and one worker process for each of
+the ``WORKERS``.  Each worker is configured from the same ``iconfig.yml``.
+The workers' output is logged in ``.logs/worker_<name>.log``.
+
+Worker names:
+
+========================  ====================================================
+name                      callback
+========================  ====================================================
+``catalog``               inserts into the catalog (not a temporary catalog)
+``nxwriter``              NeXus file writer
+``specwriter``            SPEC file writer
+``module:function``       ``function()`` (in ``module``) returns a callback
+========================  ====================================================
+
+A worker can also be started by hand::
+
+    python -m instrument.callbacks.document_worker specwriter
+
+.. caution:: A callback in a worker process is not the one in the session.
+    For example, ``newSpecFile()`` in the session does not change the file
+    written by the ``specwriter`` worker.  Documents published before the
+    proxy and workers are connected are not received.
+
+.. autosummary::
+    :nosignatures:
+
+    ~make_consumer
+    ~run_worker
+    ~start_workers
+    ~main
+"""
+
+__all__ = [
+    "make_consumer",
+    "run_worker",
+    "start_workers",
+    "main",
+]
+
+import argparse
+import importlib
+import logging
+import signal
+import sys
+
+from ..utils.config_loaders import iconfig
+from ..utils.process_supervisor import ProcessSupervisor
+from .queued_callback import DEFAULT_QUEUE_SIZE
+from .queued_callback import QueuedCallback
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+DEFAULT_PROXY_ADDRESS = "localhost:5567"  # The RunEngine publishes here.
+DEFAULT_WORKER_ADDRESS = "localhost:5568"  # The workers subscribe here.
+DEFAULT_WORKERS = ["nxwriter", "specwriter"]
+PROXY_CODE = "from bluesky.commandline.zmq_proxy import main; main()"
+
+
+def _catalog():
+    """Internal: Insert documents into the (shared) catalog."""
+    import databroker
+
+    from .catalog_inserter import make_catalog_callback
+
+    name = iconfig.get("DATABROKER_CATALOG")
+    try:
+        cat = databroker.catalog[name].v2
+    except KeyError as exc:
+        raise KeyError(
+            f"Catalog {name!r} not found.  A temporary catalog"
+            " cannot be shared with a worker process."
+        ) from exc
+    return make_catalog_callback(cat.v1.insert)
+
+
+def _nxwriter():
+    """Internal: Write NeXus files."""
+    from .nexus_writer import make_nxwriter
+
+    return make_nxwriter().receiver
+
+
+def _specwriter():
+    """Internal: Write a SPEC file."""
+    from .spec_writer import make_specwriter
+
+    writer = make_specwriter()
+    logger.info("SPEC data file: %s", writer.spec_filename.resolve())
+    if not writer.batched:
+        return writer.receiver
+    spec_config = iconfig.get("SPEC_DATA_FILES") or {}
+    return QueuedCallback(
+        writer.receiver,
+        flush=writer.flush,
+        maxsize=spec_config.get("QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+        name="spec_writer",
+    )
+
+
+CONSUMERS = dict(catalog=_catalog, nxwriter=_nxwriter, specwriter=_specwriter)
+
+
+def make_consumer(name):
+    """Create the callback of the worker 'name' (see the table above)."""
+    if name in CONSUMERS:
+        return CONSUMERS[name]()
+    if ":" not in name:
+        raise KeyError(
+            f"Unknown worker {name!r}: use one of {sorted(CONSUMERS)}"
+            " or 'module:function'."
+        )
+    module_name, function_name = name.split(":", 1)
+    function = getattr(importlib.import_module(module_name), function_name)
+    return function()
+
+
+def run_worker(name, address=DEFAULT_WORKER_ADDRESS):
+    """Send documents from the proxy at 'address' to the callback 'name'."""
+    # pyzmq is needed only here.
+    from bluesky.callbacks.zmq import RemoteDispatcher
+
+    callback = make_consumer(name)
+    dispatcher = RemoteDispatcher(address)
+    dispatcher.subscribe(callback)
+    logger.info("Worker %r: documents from %s.", name, address)
+    try:
+        dispatcher.start()  # Until interrupted.
+    finally:
+        close = getattr(callback, "close", None)
+        if close is not None:
+            close()  # Write everything still queued.
+
+
+def _port(address):
+    """Internal: The port number of 'host:port'."""
+    return address.rsplit(":", 1)[-1]
+
+
+def start_workers(config):
+    """
+    Start the proxy and the worker processes (``ZMQ_PUBLISH`` config).
+
+    Return the :class:`~instrument.utils.process_supervisor.ProcessSupervisor`.
+    """
+    proxy_address = config.get("PROXY_ADDRESS", DEFAULT_PROXY_ADDRESS)
+    worker_address = config.get("WORKER_ADDRESS", DEFAULT_WORKER_ADDRESS)
+    supervisor = ProcessSupervisor(log_directory=config.get("LOG_DIRECTORY", ".logs"))
+    if config.get("START_PROXY", True):
+        supervisor.add(
+            "zmq_proxy",
+            [
+                sys.executable,
+                "-c",
+                PROXY_CODE,
+                _port(proxy_address),
+                _port(worker_address),
+            ],
+        )
+    for name in config.get("WORKERS", DEFAULT_WORKERS):
+        supervisor.add(
+            f"worker_{name.replace(':', '_')}",
+            [sys.executable, "-m", __name__, name, "--address", worker_address],
+        )
+    supervisor.start()
+    return supervisor
+
+
+def main():
+    """Command-line entry: run one worker."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("name", help="Worker name (or 'module:function').")
+    parser.add_argument(
+        "--address",
+        default=DEFAULT_WORKER_ADDRESS,
+        help=f"Address of the 0MQ proxy.  Default: {DEFAULT_WORKER_ADDRESS}",
+    )
+    args = parser.parse_args()
+    # Stopped by the supervisor: finish writing (as for ^C).
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        run_worker(args.name, args.address)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -5,52 +5,34 @@ NeXus Writer
 
 Write scan(s) to a NeXus/HDF5 file.
 
+Configure with ``NEXUS_DATA_FILES`` in ``iconfig.yml``.  With
+``ASYNCHRONOUS: true``, each run's file is written by a worker thread from
+a snapshot of the run, while the RunEngine continues with the next run.
+With ``STREAMING: true``, data is appended to the file as it arrives.
+With ``AREA_DETECTOR_DATA: virtual``, area detector frames are not copied
+from the detector's HDF5 file, a virtual dataset refers to them.
+
+The writer class is :class:`~instrument.callbacks.nexus_writer.MyNXWriter`.
+
 .. autosummary::
     :nosignatures:
 
-    ~MyNXWriter
     ~nxwriter
 """
 
 import logging
 
-from ..core.run_engine_init import RE
-from ..utils.aps_functions import host_on_aps_subnet
+from ..core.run_engine_init import router
 from ..utils.config_loaders import iconfig
+from .nexus_writer import MyNXWriter  # noqa: F401
+from .nexus_writer import make_nxwriter
 
 logger = logging.getLogger(__name__)
 logger.bsdev(__file__)
 
 
-if host_on_aps_subnet():
-    from apstools.callbacks import NXWriterAPS as NXWriter
-else:
-    from apstools.callbacks import NXWriter
-
-
-class MyNXWriter(NXWriter):
-    """Patch to get sample title from metadata, if available."""
-
-    def get_sample_title(self):
-        """
-        Get the title from the metadata or modify the default.
-
-        default title: S{scan_id}-{plan_name}-{short_uid}
-        """
-        try:
-            title = self.metadata["title"]
-        except KeyError:
-            # title = super().get_sample_title()  # the default title
-            title = f"S{self.scan_id:05d}-{self.plan_name}-{self.uid[:7]}"
-        return title
-
-
-nxwriter = MyNXWriter()  # create the callback instance
+nxwriter = make_nxwriter()  # create the callback instance
 """The NeXus file writer object."""
 
 if "NEXUS_DATA_FILES" in iconfig:
-    RE.subscribe(nxwriter.receiver)  # write data to NeXus files
-
-nxwriter.file_extension = iconfig.get("FILE_EXTENSION", "hdf")
-warn_missing = iconfig.get("WARN_MISSING", False)
-nxwriter.warn_on_missing_content = warn_missing
+    router.subscribe(nxwriter.receiver, name="nxwriter")  # write NeXus files
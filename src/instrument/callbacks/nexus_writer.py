@@ -0,0 +1,476 @@
+"""
+NeXus writer callback
+=====================
+
+Write scan(s) to a NeXus/HDF5 file.
+
+Options (see ``NEXUS_DATA_FILES`` in ``iconfig.yml``): with
+``asynchronous``, each run's file is written by a worker thread from a
+snapshot of the run, while the RunEngine continues with the next run.
+With ``streaming``, data is appended to the file as it arrives.  With
+``area_detector_data="virtual"``, area detector frames are not copied from
+the detector's HDF5 file, a virtual dataset refers to them.
+
+This module does not use the RunEngine.  The session's writer is
+``nxwriter`` in :mod:`~instrument.callbacks.nexus_data_file_writer`.
+
+.. autosummary::
+    :nosignatures:
+
+    ~MyNXWriter
+    ~make_nxwriter
+"""
+
+import concurrent.futures
+import copy
+import datetime
+import logging
+import threading
+import time
+
+import h5py
+import numpy as np
+
+from ..utils.aps_functions import host_on_aps_subnet
+from ..utils.config_loaders import iconfig
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+
+if host_on_aps_subnet():
+    from apstools.callbacks import NXWriterAPS as NXWriter
+else:
+    from apstools.callbacks import NXWriter
+
+
+AD_DATA_ADDRESS = "/entry/data/data"  # Frames in area detector HDF5 files.
+AD_DATA_MODES = ("copy", "virtual")
+DEFAULT_MAX_BACKLOG = 4
+DEFAULT_CHUNK_ROWS = 64
+LIVE_GROUP = "live_streams"  # (streaming) Data while the run is in progress.
+MAX_CHUNK_BYTES = 1024**2
+NUMPY_DTYPES = {"boolean": "bool", "integer": "int64", "number": "float64"}
+
+
+class MyNXWriter(NXWriter):
+    """
+    Patch to get sample title from metadata, if available.
+
+    When ``asynchronous`` is true, :meth:`writer` hands a snapshot of the
+    collected run to a worker thread (one file at a time, in order) and
+    returns.  The :attr:`future` of the most recent file completes when the
+    file is written (or raises the exception that stopped the writing).
+    Failed writes are logged.  When ``max_backlog`` files are waiting to be
+    written, :meth:`writer` waits (the RunEngine waits) for one to finish.
+
+    When ``streaming`` is true, the file is created with the first
+    ``descriptor`` document.  Each (non-external) data key gets resizable,
+    chunked (and, optionally, compressed) datasets in the ``/live_streams``
+    group, which grow with each event.  Data values are not kept in memory.
+    :meth:`writer` moves these datasets to their usual NeXus locations, in
+    the worker thread (as in asynchronous mode).
+    With ``swmr``, the file can be read (SWMR mode) while the run is in
+    progress.
+
+    When ``area_detector_data`` is ``"virtual"``, frames from an area
+    detector's HDF5 file are not copied.  A virtual dataset in the NeXus
+    file refers to the frames in the detector's file (which must stay
+    available).  The file name is from the ``resource`` document, which
+    ophyd writes with the detector's ``read_path_template`` (this
+    computer's view of the file).
+
+    .. autosummary::
+
+        ~descriptor
+        ~event
+        ~future
+        ~get_sample_title
+        ~wait_writer
+        ~wait_writer_plan_stub
+        ~write_stream_external
+        ~write_streams
+        ~writer
+    """
+
+    future = None
+    """Future of the most recent (asynchronous) file."""
+
+    def __init__(
+        self,
+        *args,
+        asynchronous=False,
+        max_backlog=DEFAULT_MAX_BACKLOG,
+        streaming=False,
+        chunk_rows=DEFAULT_CHUNK_ROWS,
+        compression=None,
+        compression_opts=None,
+        swmr=False,
+        area_detector_data="copy",
+        **kwargs,
+    ):
+        """Prepare the worker thread (asynchronous mode)."""
+        super().__init__(*args, **kwargs)
+        self.asynchronous = asynchronous
+        self._backlog = threading.BoundedSemaphore(max(1, max_backlog))
+        self._executor = None
+        self._futures = set()  # Files not yet written.
+        self._futures_lock = threading.Lock()  # Also used by the worker.
+
+        self.streaming = streaming
+        self.chunk_rows = max(1, chunk_rows)
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.swmr = swmr
+        self._live = None  # (streaming) The open HDF5 file.
+        self._live_datasets = {}  # (streaming) {(stream, key): (value, EPOCH)}
+        self._kept_in_memory = set()  # (streaming) (stream, key) not streamed
+
+        if area_detector_data not in AD_DATA_MODES:
+            raise ValueError(
+                f"area_detector_data={area_detector_data!r}"
+                f" must be one of {AD_DATA_MODES}"
+            )
+        self.area_detector_data = area_detector_data
+
+    def descriptor(self, doc):
+        """Describe a data stream (streaming: create its datasets)."""
+        super().descriptor(doc)
+        if self.streaming and self.scanning:
+            self._create_live_datasets(doc)
+
+    def event(self, doc):
+        """A row of data (streaming: append it to the file)."""
+        super().event(doc)
+        if self._live is None:
+            return
+        acquisition = self.acquisitions.get(doc["descriptor"])
+        if acquisition is None:
+            return
+        for key, entry in acquisition["data"].items():
+            address = (acquisition["stream"], key)
+            datasets = self._live_datasets.get(address)
+            if datasets is None:
+                continue  # Kept in memory.
+            if len(entry["time"]) == 0:
+                continue
+            columns = (entry["data"], entry["time"])
+            try:
+                arrays = [
+                    np.asarray(values, dtype=ds.dtype)
+                    for ds, values in zip(datasets, columns, strict=True)
+                ]
+                for ds, array in zip(datasets, arrays, strict=True):
+                    if array.shape != (len(entry["time"]), *ds.shape[1:]):
+                        raise ValueError(f"shape {array.shape}, not {ds.shape}")
+            except (TypeError, ValueError) as reason:
+                logger.warning(
+                    "%s: not streamed, kept in memory (%s).", datasets[0].name, reason
+                )
+                self._keep_in_memory(address, entry)
+                continue
+            for ds, array in zip(datasets, arrays, strict=True):
+                n = ds.shape[0]
+                ds.resize(n + len(array), axis=0)
+                ds[n:] = array
+                if self.swmr:
+                    ds.flush()
+            entry["data"].clear()
+            entry["time"].clear()
+
+    def _keep_in_memory(self, address, entry):
+        """Internal: (streaming) Stop streaming this key, reload its rows."""
+        value, epoch = self._live_datasets.pop(address)
+        if h5py.check_string_dtype(value.dtype) is not None:
+            value = value.asstr()  # str, as received (not bytes).
+        entry["data"][:0] = list(value[()])  # The rows streamed already.
+        entry["time"][:0] = list(epoch[()])
+        self._kept_in_memory.add(address)  # Written at stop, as usual.
+
+    def _create_live_datasets(self, doc):
+        """Internal: (streaming) Datasets for the data keys of a stream."""
+        if self._live is None:
+            fname = self.file_name or self.make_file_name()
+            self._live = h5py.File(fname, "w", libver="latest" if self.swmr else None)
+            self._live_datasets = {}
+            self._kept_in_memory = set()  # New set: a written run keeps its own.
+        elif self._live.swmr_mode:
+            # No new objects in SWMR mode: reopen the file.
+            fname = self._live.filename
+            self._live.close()
+            self._live = h5py.File(fname, "a", libver="latest")
+            for address, (value, epoch) in self._live_datasets.items():
+                self._live_datasets[address] = (
+                    self._live[value.name],
+                    self._live[epoch.name],
+                )
+
+        stream = doc["name"]
+        for key, data_key in doc["data_keys"].items():
+            if data_key.get("external") is not None:
+                continue  # Area detector frames (and such) are not streamed.
+            shape = tuple(data_key.get("shape") or ())
+            if data_key["dtype"] == "string":
+                dtype = h5py.string_dtype() if len(shape) == 0 else None
+            else:
+                dtype = data_key.get("dtype_numpy")
+                dtype = dtype or NUMPY_DTYPES.get(data_key["dtype"])
+                if dtype is not None and np.dtype(dtype).kind not in "biuf":
+                    dtype = None  # Only numbers.
+            if dtype is None or None in shape or (stream, key) in self._live_datasets:
+                continue  # Kept in memory.
+            dtype = np.dtype(dtype)
+            row_bytes = max(1, dtype.itemsize * int(np.prod(shape, dtype=int)))
+            rows = max(1, min(self.chunk_rows, MAX_CHUNK_BYTES // row_bytes))
+            group = self._live.require_group(f"{LIVE_GROUP}/{stream}/{key}")
+            self._live_datasets[(stream, key)] = tuple(
+                group.create_dataset(
+                    name,
+                    shape=(0, *row_shape),
+                    maxshape=(None, *row_shape),
+                    chunks=(rows, *row_shape),
+                    dtype=ds_dtype,
+                    compression=self.compression,
+                    compression_opts=self.compression_opts,
+                )
+                for name, row_shape, ds_dtype in (
+                    ("value", shape, dtype),
+                    ("EPOCH", (), np.dtype("float64")),
+                )
+            )
+
+        if self.swmr:
+            self._live.swmr_mode = True
+
+    def _close_live_file(self):
+        """Internal: (streaming) Close the file, return its name."""
+        fname = self._live.filename
+        self._live.close()
+        self._live = None
+        self._live_datasets = {}
+        return fname
+
+    def get_sample_title(self):
+        """
+        Get the title from the metadata or modify the default.
+
+        default title: S{scan_id}-{plan_name}-{short_uid}
+        """
+        try:
+            title = self.metadata["title"]
+        except KeyError:
+            # title = super().get_sample_title()  # the default title
+            title = f"S{self.scan_id:05d}-{self.plan_name}-{self.uid[:7]}"
+        return title
+
+    def wait_writer(self):
+        """Wait for all files to be written.  (Not in a plan.)"""
+        with self._futures_lock:
+            futures = list(self._futures)
+        concurrent.futures.wait(futures)
+        super().wait_writer()
+
+    def wait_writer_plan_stub(self):
+        """Wait for all files to be written.  Use in a plan (with RunEngine)."""
+        import bluesky.plan_stubs as bps
+
+        while True:
+            with self._futures_lock:
+                pending = len(self._futures)
+            if pending == 0:
+                break
+            yield from bps.sleep(self._external_file_read_retry_delay)
+        yield from super().wait_writer_plan_stub()
+
+    def writer(self):
+        """Write the collected run to a NeXus file (maybe asynchronously)."""
+        if self._live is not None:
+            fname, mode = self._close_live_file(), "a"
+        elif self.asynchronous:
+            fname, mode = self.file_name or self.make_file_name(), "w"
+        else:
+            super().writer()  # In apstools' thread.
+            return
+
+        # Not in the RunEngine's thread: writing can wait (for area detector
+        # files).  The next start document replaces (does not modify) the
+        # collected run's containers, so a shallow copy keeps this run's
+        # content.
+        run = copy.copy(self)
+
+        if not self._backlog.acquire(blocking=False):
+            logger.warning("NeXus writer backlog is full, waiting.")
+            t0 = time.time()
+            self._backlog.acquire()
+            logger.info("NeXus writer waited %.3f s.", time.time() - t0)
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="nxwriter"
+            )
+        future = self._executor.submit(run._write_file, fname, mode)
+        with self._futures_lock:
+            self._futures.add(future)
+        future.add_done_callback(self._file_written)
+        self.future = future
+
+    def _file_written(self, future):
+        """Internal: report the outcome of an asynchronous write."""
+        with self._futures_lock:
+            self._futures.discard(future)
+        self._backlog.release()
+        error = future.exception()
+        if error is None:
+            self.output_nexus_file = future.result()
+        else:
+            logger.error("NeXus file not written: %s", error, exc_info=error)
+
+    def _write_file(self, fname, mode="w"):
+        """Internal: Write the NeXus file (in the calling thread)."""
+        try:
+            with h5py.File(fname, mode) as self.root:
+                self.write_root(fname)
+                if LIVE_GROUP in self.root:
+                    del self.root[LIVE_GROUP]
+        finally:
+            self.root = None
+        logger.info("wrote NeXus file: %s", fname)
+        return fname
+
+    def write_stream_external(self, parent, d, subgroup, stream_name, k, v):
+        """
+        Area detector frames: copy, or refer to them (virtual dataset).
+        """
+        if self.area_detector_data == "copy":
+            super().write_stream_external(parent, d, subgroup, stream_name, k, v)
+            return
+
+        resource_ids = sorted({self.externals[datum_id]["resource"] for datum_id in d})
+        if len(resource_ids) != 1:
+            raise ValueError(
+                f"{len(resource_ids)} unique resource UIDs: {resource_ids}"
+            )
+        resource_id = resource_ids[0]
+        fname = self.getResourceFile(resource_id)
+
+        # Only the shape and type of the frames are read from the file.
+        t0 = time.time()
+        while True:
+            try:
+                with h5py.File(fname, "r") as root:
+                    shape = root[AD_DATA_ADDRESS].shape
+                    dtype = root[AD_DATA_ADDRESS].dtype
+                break
+            except (OSError, BlockingIOError, KeyError) as reason:
+                if time.time() - t0 > self._external_file_read_timeout:
+                    logger.error("Could not read %s: %s", fname, reason)
+                    return
+                time.sleep(self._external_file_read_retry_delay)
+
+        layout = h5py.VirtualLayout(shape=shape, dtype=dtype)
+        layout[...] = h5py.VirtualSource(str(fname), AD_DATA_ADDRESS, shape=shape)
+        ds = subgroup.create_virtual_dataset("value", layout)
+        ds.attrs["target"] = ds.name
+        ds.attrs["source_file"] = str(fname)
+        ds.attrs["source_address"] = AD_DATA_ADDRESS
+        ds.attrs["resource_id"] = resource_id
+        ds.attrs["units"] = ""
+        subgroup.attrs["signal"] = "value"
+        logger.info("%s: virtual dataset of %s in %s", k, AD_DATA_ADDRESS, fname)
+
+    def write_streams(self, parent):
+        """
+        group: /entry/instrument/bluesky/streams:NXnote
+
+        As ``NXWriter.write_streams()``, also moving the data streamed to
+        the ``/live_streams`` group.
+        """
+        if LIVE_GROUP not in self.root:
+            return super().write_streams(parent)
+
+        bluesky = self.create_NX_group(parent, "streams:NXnote")
+        for stream_name, uids in self.streams.items():
+            if len(uids) != 1:
+                raise ValueError(
+                    f"stream {len(uids)} has descriptors, expecting only 1"
+                )
+            group = self.create_NX_group(bluesky, stream_name + ":NXnote")
+            group.attrs["uid"] = uids[0]
+            acquisition = self.acquisitions[uids[0]]
+            for k, v in acquisition["data"].items():
+                subgroup = self.create_NX_group(group, k + ":NXdata")
+                live = f"/{LIVE_GROUP}/{stream_name}/{k}"
+                streamed = (stream_name, k) not in self._kept_in_memory
+                if streamed and live in self.root:
+                    self._move_live_data(live, subgroup, stream_name, k, v)
+                else:
+                    method = self.write_stream_internal
+                    if v["external"]:
+                        method = self.write_stream_external
+                    method(parent, v["data"], subgroup, stream_name, k, v)
+                    subgroup.create_dataset("EPOCH", data=np.array(v["time"]))
+                self._write_time_datasets(subgroup)
+
+            # link images to parent names
+            for k in group:
+                if k.endswith("_image") and k[:-6] not in group:
+                    group[k[:-6]] = group[k]
+
+        return bluesky
+
+    def _move_live_data(self, live, subgroup, stream_name, k, v):
+        """Internal: (streaming) Move the streamed datasets into 'subgroup'."""
+        subgroup.attrs["signal"] = "value"
+        subgroup.attrs["axes"] = ["time"]
+        for name in ("value", "EPOCH"):
+            self.root.move(f"{live}/{name}", f"{subgroup.name}/{name}")
+        ds = subgroup["value"]
+        ds.attrs["target"] = ds.name
+        self.add_dataset_attributes(ds, v, k)
+        if stream_name == "baseline" and ds.shape[0] > 0:
+            for name, row in (("value_start", 0), ("value_end", -1)):
+                ds_row = subgroup.create_dataset(name, data=ds[row])
+                self.add_dataset_attributes(ds_row, v, k)
+                ds_row.attrs["target"] = ds_row.name
+
+    def _write_time_datasets(self, subgroup):
+        """Internal: Attributes of 'EPOCH', 'time' relative to the first."""
+        epoch = subgroup["EPOCH"]
+        epoch.attrs["units"] = "s"
+        epoch.attrs["long_name"] = "epoch time (s)"
+        epoch.attrs["target"] = epoch.name
+        if epoch.shape[0] == 0:
+            return
+
+        t_start = float(epoch[0])
+        ds = subgroup.create_dataset(
+            "time", shape=epoch.shape, dtype=epoch.dtype, chunks=epoch.chunks
+        )
+        rows = (epoch.chunks or epoch.shape)[0]
+        for start in range(0, epoch.shape[0], rows):  # Not all in memory.
+            ds[start : start + rows] = epoch[start : start + rows] - t_start
+        ds.attrs["units"] = "s"
+        ds.attrs["long_name"] = "time since first data (s)"
+        ds.attrs["target"] = ds.name
+        ds.attrs["start_time"] = t_start
+        ds.attrs["start_time_iso"] = datetime.datetime.fromtimestamp(
+            t_start
+        ).isoformat()
+
+
+def make_nxwriter():
+    """Create a NeXus writer, as configured in ``iconfig.yml``."""
+    nexus_config = iconfig.get("NEXUS_DATA_FILES") or {}
+    writer = MyNXWriter(
+        asynchronous=nexus_config.get("ASYNCHRONOUS", False),
+        max_backlog=nexus_config.get("MAX_BACKLOG", DEFAULT_MAX_BACKLOG),
+        streaming=nexus_config.get("STREAMING", False),
+        chunk_rows=nexus_config.get("CHUNK_ROWS", DEFAULT_CHUNK_ROWS),
+        compression=nexus_config.get("COMPRESSION"),
+        compression_opts=nexus_config.get("COMPRESSION_OPTS"),
+        swmr=nexus_config.get("SWMR", False),
+        area_detector_data=nexus_config.get("AREA_DETECTOR_DATA", "copy"),
+    )
+    writer.file_extension = iconfig.get("FILE_EXTENSION", "hdf")
+    writer.warn_on_missing_content = iconfig.get("WARN_MISSING", False)
+    return writer
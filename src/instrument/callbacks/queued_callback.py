@@ -0,0 +1,184 @@
+"""
+Queued callbacks
+================
+
+Run a RunEngine callback in a background thread.
+
+The RunEngine only puts each document into a (bounded) queue.  A worker
+thread takes the documents from the queue and passes them to the callback.
+Documents that arrive while the callback is busy are handled together as a
+*batch*, followed by a call to ``flush()`` (if given).  With a
+``flush_interval``, ``flush()`` is called at most that often (and when the
+queue has been idle that long) instead.  When the queue is full, the
+RunEngine waits for the worker to catch up.  For the document names in
+``wait_for`` (such as ``stop``), the RunEngine waits until the queue has
+been handled and flushed.
+
+EXAMPLE::
+
+    queued = QueuedCallback(writer.receiver, flush=writer.flush)
+    RE.subscribe(queued)
+
+.. caution:: Exceptions raised by the callback are logged, not raised
+    in the RunEngine.
+
+.. autosummary::
+    :nosignatures:
+
+    ~QueuedCallback
+"""
+
+__all__ = ["QueuedCallback"]
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+DEFAULT_QUEUE_SIZE = 1000
+_STOP_WORKER = object()  # Placed in the queue to end the worker thread.
+
+
+class QueuedCallback:
+    """
+    Pass RunEngine documents to a callback, in a background thread.
+
+    .. autosummary::
+
+        ~close
+        ~join
+
+    PARAMETERS
+
+    callback : callable
+        Called (in the worker thread) with each ``(name, doc)`` pair.
+    flush : callable
+        Called with no arguments after each batch and after each
+        ``stop`` document.  Default: ``None``
+    flush_interval : float
+        If given, call ``flush()`` at most this often (seconds), instead of
+        after each batch.  Default: ``None``
+    wait_for : [str]
+        Names of the documents for which the caller waits until all queued
+        documents have been handled and flushed.  Default: ``()``
+    maxsize : int
+        Maximum number of documents waiting in the queue.
+        Default: 1000
+    name : str
+        Name of the worker thread.
+    """
+
+    def __init__(
+        self,
+        callback,
+        *,
+        flush=None,
+        flush_interval=None,
+        wait_for=(),
+        maxsize=DEFAULT_QUEUE_SIZE,
+        name=None,
+    ):
+        """Start the worker thread."""
+        self.callback = callback
+        self.flush = flush
+        self.flush_interval = flush_interval
+        self.wait_for = set(wait_for)
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._thread = threading.Thread(
+            target=self._worker,
+            name=name or f"queued_{getattr(callback, '__name__', 'callback')}",
+            daemon=True,
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __call__(self, name, doc):
+        """Queue the document (waits if the queue is full)."""
+        if not self._thread.is_alive():
+            raise RuntimeError(f"Worker thread {self._thread.name!r} is not running.")
+        self._queue.put((name, doc))
+        if name in self.wait_for:
+            self._queue.join()
+
+    def __repr__(self):
+        """Representation of this object."""
+        return (
+            f"<{self.__class__.__name__} {self._thread.name!r}"
+            f" waiting={self._queue.qsize()}>"
+        )
+
+    def join(self):
+        """Wait until all queued documents have been handled and flushed."""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self, timeout=10):
+        """Handle all queued documents, then stop the worker thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP_WORKER)
+            self._thread.join(timeout=timeout)
+
+    def _flush(self):
+        """Internal: call flush(), log any exception, mark the queue done."""
+        if self.flush is not None:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("%s: flush() failed", self._thread.name)
+        for _ in range(self._unflushed):
+            self._queue.task_done()  # join() returns after the flush.
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def _next_item(self):
+        """Internal: next item from the queue, ``None`` when time to flush."""
+        if self._unflushed == 0 or self.flush_interval is None:
+            return self._queue.get()
+        timeout = self._last_flush + self.flush_interval - time.monotonic()
+        try:
+            return self._queue.get(timeout=max(0, timeout))
+        except queue.Empty:
+            return None
+
+    def _worker(self):
+        """Internal: handle the queued documents, in batches."""
+        self._unflushed = 0  # Items handled (not marked done) since the flush.
+        self._last_flush = time.monotonic()
+        running = True
+        while running:
+            item = self._next_item()
+            if item is None:  # Idle for flush_interval.
+                self._flush()
+                continue
+            batch = [item]
+            while len(batch) < self._queue.maxsize:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in batch:
+                self._unflushed += 1
+                if item is _STOP_WORKER:
+                    running = False
+                    continue
+                name, doc = item
+                try:
+                    self.callback(name, doc)
+                except Exception:
+                    logger.exception(
+                        "%s: error handling %r document", self._thread.name, name
+                    )
+                if name == "stop" or name in self.wait_for:
+                    self._flush()
+
+            if (
+                not running
+                or self.flush_interval is None
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._flush()
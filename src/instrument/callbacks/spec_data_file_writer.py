@@ -2,12 +2,23 @@
 custom callbacks
 ================
 
+Configure with ``SPEC_DATA_FILES`` in ``iconfig.yml``.  With ``QUEUED:
+true``, the SPEC file is written in a background thread (not the
+RunEngine's), in batches.  With ``STREAMING: true``, the scan header is
+written when the run's data stream is described, and data values are not
+kept in memory once written (for long runs).  With ``SCAN_INDEX: true``, an
+index of the scans is kept next to the SPEC file (see
+:mod:`~instrument.utils.spec_scan_index`).
+
+The writer class is :class:`~instrument.callbacks.spec_writer.SpecWriter`.
+
 .. autosummary::
     :nosignatures:
 
     ~newSpecFile
     ~spec_comment
     ~specwriter
+    ~spec_queue
 """
 
 import datetime
@@ -18,7 +29,12 @@ import apstools.callbacks
 import apstools.utils
 
 from ..core.run_engine_init import RE
+from ..core.run_engine_init import router
 from ..utils.config_loaders import iconfig
+from .queued_callback import DEFAULT_QUEUE_SIZE
+from .queued_callback import QueuedCallback
+from .spec_writer import SpecWriter  # noqa: F401
+from .spec_writer import make_specwriter
 
 logger = logging.getLogger(__name__)
 logger.bsdev(__file__)
@@ -26,10 +42,13 @@ logger.bsdev(__file__)
 
 DEFAULT_FILE_EXTENSION = "dat"
 file_extension = iconfig.get("FILE_EXTENSION", DEFAULT_FILE_EXTENSION)
+spec_config = iconfig.get("SPEC_DATA_FILES") or {}
 
 
 def spec_comment(comment, doc=None):
     """Make it easy for user to add comments to the data file."""
+    if spec_queue is not None:
+        spec_queue.join()  # The writer must not be busy.
     apstools.callbacks.spec_comment(comment, doc, specwriter)
 
 
@@ -43,6 +62,9 @@ def newSpecFile(title, scan_id=None, RE=None):
     If the SPEC file already exists, then ``scan_id`` is ignored and
     ``RE.md["scan_id"]`` is set to the last scan number in the file.
     """
+    if spec_queue is not None:
+        spec_queue.join()  # Finish writing to the current file.
+
     kwargs = {}
     if RE is not None:
         kwargs["RE"] = RE
@@ -64,21 +86,24 @@ def newSpecFile(title, scan_id=None, RE=None):
 
 
 # write scans to SPEC data file
-try:
-    # apstools >=1.6.21
-    _specwriter = apstools.callbacks.SpecWriterCallback2()
-except AttributeError:
-    # apstools <1.6.21
-    _specwriter = apstools.callbacks.SpecWriterCallback()
-
-specwriter = _specwriter
+# make the SPEC file in current working directory (assumes is writable)
+specwriter = make_specwriter()
 """The SPEC file writer object."""
 
-# make the SPEC file in current working directory (assumes is writable)
-specwriter.newfile(specwriter.spec_filename)
+spec_queue = None
+"""Queue of documents for the SPEC file writer (if ``QUEUED``)."""
 
 if "SPEC_DATA_FILES" in iconfig:
-    RE.subscribe(specwriter.receiver)  # write data to SPEC files
+    if specwriter.batched:
+        spec_queue = QueuedCallback(
+            specwriter.receiver,
+            flush=specwriter.flush,
+            maxsize=spec_config.get("QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+            name="spec_writer",
+        )
+        router.subscribe(spec_queue, name="specwriter")  # in a thread
+    else:
+        router.subscribe(specwriter.receiver, name="specwriter")
     logger.info("SPEC data file: %s", specwriter.spec_filename.resolve())
 
 try:
@@ -0,0 +1,174 @@
+"""
+SPEC writer callback
+====================
+
+Write scans to a SPEC data file, with options for batched and streaming
+output, and an index of the scans (see ``SPEC_DATA_FILES`` in
+``iconfig.yml``).
+
+This module does not use the RunEngine.  The session's writer is
+``specwriter`` in :mod:`~instrument.callbacks.spec_data_file_writer`.
+
+.. autosummary::
+    :nosignatures:
+
+    ~SpecWriter
+    ~make_specwriter
+"""
+
+import getpass
+import logging
+import pathlib
+import socket
+import threading
+import time
+
+import apstools.callbacks
+
+from ..utils.config_loaders import iconfig
+from ..utils.spec_scan_index import SpecScanIndex
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+
+class SpecWriter(apstools.callbacks.SpecWriterCallback2):
+    """
+    SPEC file writer, with options for batched and streaming output.
+
+    When ``batched`` is true, output lines are kept in memory until
+    :meth:`flush` writes them (with one file ``open()``).  Otherwise, lines
+    are written at once (as by ``SpecWriterCallback2``).
+
+    When ``streaming`` is true, the scan header is written with the
+    ``descriptor`` of the primary stream (not with its first event).  Data
+    values are discarded once written, and ``datum`` documents are not kept,
+    so memory use does not grow with the length of the run.
+
+    When ``index_scans`` is true, the scan index of the file
+    (:class:`~instrument.utils.spec_scan_index.SpecScanIndex`) is updated
+    when a file header (``#F``) or scan header (``#S``) is written, and at
+    the end of each run (not for each data row).  :meth:`newfile` finds the
+    last scan number of an existing file from its index.
+
+    .. autosummary::
+
+        ~datum
+        ~descriptor
+        ~event
+        ~flush
+        ~newfile
+        ~stop
+    """
+
+    def __init__(
+        self, *args, batched=False, streaming=False, index_scans=False, **kwargs
+    ):
+        """Start with no output lines waiting."""
+        self.batched = batched
+        self.streaming = streaming
+        self.index_scans = index_scans
+        self.scan_index = None  # SpecScanIndex of the current file.
+        self._index_stale = False  # Headers written, not yet indexed.
+        self._pending = []  # Output text, not yet written.
+        self._pending_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _write_lines_(self, lines, mode="a"):
+        """Write (more) lines to the file (or wait for flush())."""
+        if any(line.startswith(("#F ", "#S ")) for line in lines):
+            self._index_stale = True
+        if not self.batched or mode not in ("a", "a+"):
+            self.flush()
+            super()._write_lines_(lines, mode=mode)
+            self._update_scan_index()
+            return
+        with self._pending_lock:
+            self._pending.append("\n".join(lines + [""]))
+
+    def datum(self, doc):
+        """Keep datum documents (unless streaming)."""
+        if not self.streaming:
+            super().datum(doc)
+
+    def descriptor(self, doc):
+        """Describe a data stream (streaming: write the scan header now)."""
+        super().descriptor(doc)
+        if self.streaming and self.scanning and doc["name"] == "primary":
+            self.write_file_header()
+            self.write_scan_header()
+
+    def event(self, doc):
+        """Write a row of data (streaming: then discard the values)."""
+        super().event(doc)
+        if self.streaming:
+            acquisition = self.acquisitions.get(doc["descriptor"])
+            for entry in (acquisition or {}).get("data", {}).values():
+                entry["data"].clear()
+                entry["time"].clear()
+
+    def flush(self):
+        """Write any output lines waiting in memory."""
+        with self._pending_lock:
+            if len(self._pending) == 0:
+                return
+            text, self._pending = "".join(self._pending), []
+            with open(self.file_name, "a") as f:
+                f.write(text)
+        self._update_scan_index()
+
+    def stop(self, doc):
+        """End of the run: index the scan once it is written."""
+        super().stop(doc)
+        self._index_stale = True
+        if not self.batched:
+            self._update_scan_index()  # Batched: after the next flush().
+
+    def _update_scan_index(self):
+        """Internal: Index any scan (or file) headers just written."""
+        if self.scan_index is not None and self._index_stale:
+            self._index_stale = False
+            self.scan_index.update()
+
+    def newfile(self, filename=None, scan_id=None, RE=None):
+        """
+        Write any waiting lines, then prepare to use a new SPEC file.
+
+        With ``index_scans``, the last scan number of an existing file comes
+        from its scan index (not from reading the whole file).
+        """
+        self.flush()
+        filename = pathlib.Path(filename or self.make_default_filename())
+        index = SpecScanIndex(filename) if self.index_scans else None
+        if index is None or not filename.exists() or isinstance(scan_id, bool):
+            result = super().newfile(filename, scan_id=scan_id, RE=RE)
+        else:
+            # As SpecWriterCallback2.newfile(), without parsing the file.
+            scan_id = max(scan_id or 0, index.highest_scan_number())
+            self.clear()
+            self.spec_filename = filename
+            self.spec_epoch = int(time.time())
+            self.spec_host = socket.gethostname() or "localhost"
+            self.spec_user = getpass.getuser() or "BlueskyUser"
+            if RE is not None:
+                RE.md["scan_id"] = scan_id
+                self.scan_id = scan_id
+            result = self.spec_filename
+        self.scan_index = index
+        return result
+
+
+def make_specwriter():
+    """
+    Create a SPEC writer, as configured in ``iconfig.yml``.
+
+    Its SPEC file (default name) is in the current working directory.
+    """
+    spec_config = iconfig.get("SPEC_DATA_FILES") or {}
+    writer = SpecWriter(
+        batched=spec_config.get("QUEUED", False),
+        streaming=spec_config.get("STREAMING", False),
+        index_scans=spec_config.get("SCAN_INDEX", False),
+    )
+    writer.newfile(writer.spec_filename)
+    return writer
@@ -8,7 +8,11 @@ from ..utils.aps_functions import aps_dm_setup
 from ..utils.config_loaders import iconfig
 from ..utils.helper_functions import debug_python
 from ..utils.helper_functions import mpl_setup
+from ..utils.startup_profiler import profiler
 
-debug_python()
-mpl_setup()
-aps_dm_setup(iconfig.get("DM_SETUP_FILE"))
+with profiler.phase("core.debug_python"):
+    debug_python()
+with profiler.phase("core.mpl_setup"):
+    mpl_setup()
+with profiler.phase("core.aps_dm_setup"):
+    aps_dm_setup(iconfig.get("DM_SETUP_FILE"))
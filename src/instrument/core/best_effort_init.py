@@ -2,12 +2,22 @@
 BestEffortCallback: simple real-time visualizations, provides ``bec``.
 ======================================================================
 
+The table and plots can be throttled (see ``BEC`` in ``iconfig.yml``).
+Table rows are printed at most ``TABLE_MAX_RATE`` times per second (the
+last row is always printed).  Plots are redrawn every
+``PLOT_REDRAW_EVERY`` events (and at the end of the run), with at most
+``PLOT_MAX_POINTS`` points in each line.  The peak statistics (``peaks``)
+are computed from every point.
+
 .. autosummary::
     ~bec
     ~peaks
+    ~ThrottledBestEffortCallback
 """
 
 import logging
+import math
+import time
 
 from bluesky.callbacks.best_effort import BestEffortCallback
 
@@ -17,11 +27,105 @@ from ..utils.helper_functions import running_in_queueserver
 logger = logging.getLogger(__name__)
 logger.bsdev(__file__)
 
-bec = BestEffortCallback()
-"""BestEffortCallback object, creates live tables and plots."""
+
+def _throttle_table(table, max_rate):
+    """Internal: Print at most 'max_rate' rows per second in a LiveTable."""
+    interval = 1 / max_rate
+    event, stop = table.event, table.stop
+    state = dict(printed=-math.inf, held=None)
+
+    def throttled_event(doc):
+        now = time.monotonic()
+        if now - state["printed"] < interval:
+            state["held"] = doc  # Printed later, if it is the last one.
+            return
+        state.update(printed=now, held=None)
+        event(doc)
+
+    def throttled_stop(doc):
+        if state["held"] is not None:
+            event(state["held"])
+            state["held"] = None
+        stop(doc)
+
+    # LiveTable() calls its methods by name, for each document.
+    table.event, table.stop = throttled_event, throttled_stop
+
+
+def _throttle_plot(live_plot, redraw_every, max_points):
+    """Internal: Redraw a LivePlot less often, with fewer points."""
+    stop = live_plot.stop
+    state = dict(events=0)
+
+    def update_plot(final=False):
+        state["events"] += 1
+        if not final and state["events"] % redraw_every != 0:
+            return
+        x, y = live_plot.x_data, live_plot.y_data
+        if max_points and len(x) > max_points:
+            step = math.ceil(len(x) / max_points)
+            x, y = x[::-step][::-1], y[::-step][::-1]  # Keep the last point.
+        live_plot.current_line.set_data(x, y)
+        live_plot.ax.relim(visible_only=True)
+        live_plot.ax.autoscale_view(tight=True)
+        live_plot.ax.figure.canvas.draw_idle()
+
+    def throttled_stop(doc):
+        update_plot(final=True)
+        stop(doc)
+
+    # LivePlot.event() caches every point, then calls update_plot().
+    live_plot.update_plot, live_plot.stop = update_plot, throttled_stop
+
+
+class ThrottledBestEffortCallback(BestEffortCallback):
+    """
+    BestEffortCallback with fewer table rows and plot redraws.
+
+    PARAMETERS
+
+    table_max_rate : float
+        Maximum table rows per second.  Default: ``None`` (every event)
+    plot_redraw_every : int
+        Redraw the plots every N events.  Default: 1
+    plot_max_points : int
+        Maximum points drawn in each plot line.  Default: ``None`` (all)
+    """
+
+    def __init__(
+        self,
+        *args,
+        table_max_rate=None,
+        plot_redraw_every=1,
+        plot_max_points=None,
+        **kwargs,
+    ):
+        """Same as BestEffortCallback, with throttling options."""
+        super().__init__(*args, **kwargs)
+        self.table_max_rate = table_max_rate
+        self.plot_redraw_every = max(1, plot_redraw_every)
+        self.plot_max_points = plot_max_points
+
+    def descriptor(self, doc):
+        """Throttle the table and plots made for this stream."""
+        table = self._table
+        super().descriptor(doc)
+        if self._table is not table and self.table_max_rate:
+            _throttle_table(self._table, self.table_max_rate)
+        if self.plot_redraw_every > 1 or self.plot_max_points:
+            for live_plot in self._live_plots.get(doc["uid"], {}).values():
+                _throttle_plot(live_plot, self.plot_redraw_every, self.plot_max_points)
+
 
 bec_config = iconfig.get("BEC", {})
 
+bec = ThrottledBestEffortCallback(
+    table_max_rate=bec_config.get("TABLE_MAX_RATE"),
+    plot_redraw_every=bec_config.get("PLOT_REDRAW_EVERY", 1),
+    plot_max_points=bec_config.get("PLOT_MAX_POINTS"),
+)
+"""BestEffortCallback object, creates live tables and plots."""
+
 if not bec_config.get("BASELINE", True):
     bec.disable_baseline()
 
@@ -1,9 +1,19 @@
 """
-Databroker catalog, provides ``cat``
-====================================
+Databroker catalog, provides ``cat``, ``run_counter``, and ``run_index``
+=======================================================================
+
+``cat`` connects to the catalog in a background thread (see
+:class:`~instrument.utils.lazy_catalog.LazyCatalog`).  The session waits
+for the connection only when ``cat`` is first used.
+
+If the catalog is not found, a temporary catalog is used, limited in size
+by ``temporary_catalog`` (if ``TEMPORARY_CATALOG`` is configured).
 
 .. autosummary::
     ~cat
+    ~run_counter
+    ~run_index
+    ~temporary_catalog
 """
 
 import logging
@@ -11,20 +21,64 @@ import logging
 import databroker
 
 from ..utils.config_loaders import iconfig
+from ..utils.lazy_catalog import LazyCatalog
+from ..utils.rolling_catalog import RollingCatalog
+from ..utils.run_counter import RunCounter
+from ..utils.run_index import RunIndex
+from ..utils.stored_dict import StoredDict
 
 logger = logging.getLogger(__name__)
 logger.bsdev(__file__)
 
 TEMPORARY_CATALOG_NAME = "temp"
+DEFAULT_RUN_COUNTER_PATH = ".catalog_runs.yml"
 
 catalog_name = iconfig.get("DATABROKER_CATALOG", TEMPORARY_CATALOG_NAME)
 
-try:
-    _cat = databroker.catalog[catalog_name]
-except KeyError:
-    _cat = databroker.temp()
+run_counter_path = iconfig.get("RUN_COUNTER_PATH", DEFAULT_RUN_COUNTER_PATH)
+run_index_path = iconfig.get("RUN_INDEX_PATH")
+temporary_config = iconfig.get("TEMPORARY_CATALOG")
+
+
+def _connect():
+    """Internal: Find the catalog (in a background thread)."""
+    try:
+        catalog = databroker.catalog[catalog_name].v2
+    except KeyError:
+        catalog = databroker.temp().v2
+        run_counter.storage = {}  # Nothing to remember.
+        if run_index is not None:
+            run_index.clear(catalog.name)  # Runs of a previous session.
+        if temporary_catalog is not None:
+            temporary_catalog.catalog = catalog  # Now, limit its size.
+    logger.info("Databroker catalog: %s", catalog.name)
+    return catalog
+
 
-cat = _cat.v2
+def _evicted(uids):
+    """Internal: Runs removed from the temporary catalog."""
+    if run_index is not None:
+        run_index.remove(uids)
+    run_counter.recount()
+
+
+cat = LazyCatalog(_connect)
 """Databroker catalog object, receives new data from ``RE``."""
 
-logger.info("Databroker catalog: %s", cat.name)
+run_counter = RunCounter(cat, StoredDict(run_counter_path))
+"""Number of runs in ``cat`` (``len(run_counter)``), without a full count."""
+
+run_index = None if run_index_path is None else RunIndex(run_index_path, cat)
+"""Summaries of the runs in ``cat``, to find runs (if ``RUN_INDEX_PATH``)."""
+
+temporary_catalog = None
+"""Limits the size of a temporary catalog (if ``TEMPORARY_CATALOG``)."""
+if temporary_config is not None:
+    temporary_catalog = RollingCatalog(
+        max_runs=temporary_config.get("MAX_RUNS"),
+        max_bytes=temporary_config.get("MAX_BYTES"),
+        archive=temporary_config.get("ARCHIVE"),
+        on_evict=_evicted,
+    )
+
+cat.start()  # Connect while the session continues.
@@ -0,0 +1,242 @@
+"""
+Route documents to the session callbacks, provides ``router``.
+==============================================================
+
+The RunEngine sends each document to ``router`` (one subscription), which
+sends it to each of the session's callbacks (the catalog, BEC, and the
+SPEC and NeXus file writers).
+
+For each callback, events may be delivered in batches (``batch_size``
+events, held no longer than ``latency`` seconds).  A callback that accepts
+``event_page`` documents (``pages=True``) receives each batch as one
+event page.  Other callbacks receive event pages unpacked into events.
+Any other document first delivers the events held for that callback, so
+the order of the documents is kept.
+
+Events arriving less often than ``latency`` are delivered at once.  Held
+events are delivered within ``latency`` seconds, even when no other
+document arrives (such as during a slow or paused scan): a timer delivers
+them.  In the session, the timer is in the RunEngine's event loop
+(``router.call_later = RE.loop.call_later``), so the callbacks are called
+from the same thread as for other documents.
+
+EXAMPLE::
+
+    router.subscribe(cat.v1.insert, name="catalog", pages=True, batch_size=100)
+    RE.subscribe(router)
+
+Each callback's batch size and latency can be configured in ``iconfig.yml``
+(``DOCUMENT_ROUTER``), by the name given to ``subscribe()``.
+
+The callbacks named in ``router.remote`` run in worker processes (see
+:mod:`~instrument.callbacks.document_worker`), ``subscribe()`` ignores them.
+
+.. autosummary::
+    ~router
+    ~SessionRouter
+"""
+
+__all__ = ["SessionRouter", "router"]
+
+import logging
+import threading
+import time
+
+from event_model import pack_event_page
+from event_model import unpack_datum_page
+from event_model import unpack_event_page
+
+from ..utils.config_loaders import iconfig
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+DEFAULT_BATCH_SIZE = 1  # No batching.
+DEFAULT_LATENCY = 0.2  # seconds
+
+
+def _call_later(delay, func):
+    """Internal: Call func() after delay (s), in a timer thread."""
+    timer = threading.Timer(delay, func)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+class _Route:
+    """Internal: one callback of the router, with its held events."""
+
+    def __init__(self, router, callback, name, pages, batch_size, latency):
+        self.router = router
+        self.callback = callback
+        self.name = name
+        self.pages = pages
+        self.batch_size = max(1, batch_size)
+        self.latency = latency
+        self.events = []  # Held, not yet delivered.
+        self.first_time = 0  # When the oldest held event arrived.
+        self.last_time = 0  # When the previous event arrived.
+        self.timer = None  # Delivers the held events after 'latency'.
+        self.lock = threading.RLock()  # The timer may have its own thread.
+
+    def deliver(self):
+        """Deliver the held events."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if len(self.events) == 0:
+                return
+            events, self.events = self.events, []
+            self._send(events)
+
+    def _send(self, events):
+        """Internal: Send events to the callback."""
+        if self.pages:
+            self.callback("event_page", pack_event_page(*events))
+        else:
+            for event in events:
+                self.callback("event", event)
+
+    def event(self, doc, now):
+        """Hold (or deliver) one event."""
+        if self.batch_size == 1:
+            self.callback("event", doc)
+            return
+        with self.lock:
+            recent, self.last_time = self.last_time, now
+            if len(self.events) > 0 and (
+                self.events[0]["descriptor"] != doc["descriptor"]
+            ):
+                self.deliver()
+            if len(self.events) == 0:
+                if now - recent >= self.latency:
+                    self.callback("event", doc)  # Slow events: no batching.
+                    return
+                self.first_time = now
+                self.timer = self.router.call_later(self.latency, self.deliver)
+            self.events.append(doc)
+            if len(self.events) >= self.batch_size:
+                self.deliver()
+            elif now - self.first_time >= self.latency:
+                self.deliver()
+
+    def document(self, name, doc):
+        """Deliver any other document, after the held events."""
+        with self.lock:
+            self.deliver()
+            if self.pages:
+                self.callback(name, doc)
+            elif name == "event_page":
+                for event in unpack_event_page(doc):
+                    self.callback("event", event)
+            elif name == "datum_page":
+                for datum in unpack_datum_page(doc):
+                    self.callback("datum", datum)
+            else:
+                self.callback(name, doc)
+
+
+class SessionRouter:
+    """
+    Send RunEngine documents to several callbacks, batching events.
+
+    .. autosummary::
+
+        ~flush
+        ~subscribe
+        ~unsubscribe
+
+    PARAMETERS
+
+    config : dict
+        Batch size and latency of named callbacks:
+        ``{name: {"BATCH_SIZE": n, "LATENCY": seconds}}``.
+        Default: ``{}``
+    timings : CallbackTimings
+        If given, time each callback.  Default: ``None``
+    """
+
+    def __init__(self, config=None, timings=None):
+        """No callbacks yet."""
+        self.config = config or {}
+        self.timings = timings
+        self.remote = set()  # Names of callbacks run by worker processes.
+        # call_later(delay, func) returns an object with a cancel() method.
+        self.call_later = _call_later
+        self._routes = []
+
+    def __call__(self, name, doc):
+        """Send the document to all the callbacks."""
+        if name == "event":
+            now = time.monotonic()
+            for route in self._routes:
+                route.event(doc, now)
+        else:
+            for route in self._routes:
+                route.document(name, doc)
+
+    def __repr__(self):
+        """Representation of this object."""
+        names = [route.name for route in self._routes]
+        return f"<{self.__class__.__name__} {names}>"
+
+    def subscribe(
+        self, callback, *, name=None, pages=False, batch_size=None, latency=None
+    ):
+        """
+        Add a callback.
+
+        PARAMETERS
+
+        callback : callable
+            Called with each ``(name, doc)`` pair.
+        name : str
+            Name of this callback (in ``config``).
+            Default: the callback's ``__name__``
+        pages : bool
+            Does the callback accept ``event_page`` and ``datum_page``
+            documents?  Default: ``False``
+        batch_size : int
+            Events to deliver together.
+            Default: from ``config``, or 1 (no batching)
+        latency : float
+            Longest time (seconds) to hold events.
+            Default: from ``config``, or 0.2
+        """
+        name = name or getattr(callback, "__name__", repr(callback))
+        if name in self.remote:
+            logger.info("Route %r: in a worker process.", name)
+            return
+        config = self.config.get(name) or {}
+        if batch_size is None:
+            batch_size = config.get("BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        if latency is None:
+            latency = config.get("LATENCY", DEFAULT_LATENCY)
+        if self.timings is not None:
+            callback = self.timings.wrap(callback, name)
+        self._routes.append(_Route(self, callback, name, pages, batch_size, latency))
+        logger.debug(
+            "Route %r: pages=%s, batch_size=%s, latency=%s",
+            name,
+            pages,
+            batch_size,
+            latency,
+        )
+
+    def unsubscribe(self, callback):
+        """Remove a callback (or name), after delivering its held events."""
+        for route in list(self._routes):
+            original = getattr(route.callback, "__wrapped__", route.callback)
+            if callback in (original, route.name):
+                route.deliver()
+                self._routes.remove(route)
+
+    def flush(self):
+        """Deliver all the held events."""
+        for route in self._routes:
+            route.deliver()
+
+
+router = SessionRouter(iconfig.get("DOCUMENT_ROUTER"))
+"""Sends the RunEngine documents to the session callbacks."""
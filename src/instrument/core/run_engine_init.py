@@ -12,6 +12,10 @@ import logging
 import bluesky
 from bluesky.utils import ProgressBarManager
 
+from ..callbacks.catalog_inserter import make_catalog_callback
+from ..utils.callback_timing import CallbackTimings
+from ..utils.callback_timing import register_timing_magic
+from ..utils.callback_timing import time_subscriptions
 from ..utils.config_loaders import iconfig
 from ..utils.controls_setup import connect_scan_id_pv
 from ..utils.controls_setup import set_control_layer
@@ -21,6 +25,10 @@ from ..utils.metadata import re_metadata
 from ..utils.stored_dict import StoredDict
 from .best_effort_init import bec
 from .catalog_init import cat
+from .catalog_init import run_counter
+from .catalog_init import run_index
+from .catalog_init import temporary_catalog
+from .document_router import router
 
 logger = logging.getLogger(__name__)
 logger.bsdev(__file__)
@@ -30,6 +38,17 @@ re_config = iconfig.get("RUN_ENGINE", {})
 RE = bluesky.RunEngine()
 """The bluesky RunEngine object."""
 
+timing_config = re_config.get("CALLBACK_TIMING") or {}
+callback_timings = None
+"""Time spent in each RunEngine callback (if ``CALLBACK_TIMING`` enabled)."""
+if timing_config.get("ENABLE", False):
+    callback_timings = CallbackTimings(
+        log_interval=timing_config.get("LOG_INTERVAL", 60),
+    )
+    time_subscriptions(RE, callback_timings, exclude=[router])
+    router.timings = callback_timings
+    register_timing_magic(callback_timings)
+
 # Save/restore RE.md dictionary, in this precise order.
 if MD_PATH is not None:
     handler_name = re_config.get("MD_STORAGE_HANDLER", "StoredDict")
@@ -42,7 +61,7 @@ if MD_PATH is not None:
         if handler_name == "PersistentDict":
             RE.md = bluesky.utils.PersistentDict(MD_PATH)
         else:
-            RE.md = StoredDict(MD_PATH)
+            RE.md = StoredDict(MD_PATH, journal=re_config.get("MD_JOURNAL", False))
     except Exception as error:
         print(
             "\n"
@@ -51,14 +70,55 @@ if MD_PATH is not None:
         )
         logger.warning("%s('%s') error:%s", handler_name, MD_PATH, error)
 
-RE.md.update(re_metadata(cat))  # programmatic metadata
+RE.md.update(re_metadata())  # programmatic metadata
 RE.md.update(re_config.get("DEFAULT_METADATA", {}))
 
+
+def _connect_catalog(plan):
+    """
+    RE preprocessor: wait for the catalog (see catalog_init) before a plan.
+
+    Then name it in ``RE.md`` (unless ``DEFAULT_METADATA`` does), so the
+    start document names the catalog that receives the run.
+    """
+    catalog = cat.get()  # No wait once connected.
+    if "databroker_catalog" not in re_config.get("DEFAULT_METADATA", {}):
+        if RE.md.get("databroker_catalog") != catalog.name:
+            RE.md["databroker_catalog"] = catalog.name
+    return plan
+
+
 sd = bluesky.SupplementalData()
 """Baselines & monitors for ``RE``."""
 
-RE.subscribe(cat.v1.insert)
-RE.subscribe(bec)
+publish_config = re_config.get("ZMQ_PUBLISH") or {}
+document_workers = None
+"""Supervisor of the worker processes (if ``ZMQ_PUBLISH`` enabled)."""
+if publish_config.get("ENABLE", False):
+    # Optional: pyzmq.
+    from bluesky.callbacks.zmq import Publisher
+
+    from ..callbacks.document_worker import DEFAULT_PROXY_ADDRESS
+    from ..callbacks.document_worker import DEFAULT_WORKERS
+    from ..callbacks.document_worker import start_workers
+
+    document_workers = start_workers(publish_config)
+    router.remote.update(publish_config.get("WORKERS", DEFAULT_WORKERS))
+    RE.subscribe(Publisher(publish_config.get("PROXY_ADDRESS", DEFAULT_PROXY_ADDRESS)))
+
+router.subscribe(
+    make_catalog_callback(run_counter.counted(cat.insert)),  # Waits to connect.
+    name="catalog",
+    pages=True,
+)
+router.subscribe(bec, name="bec")
+if run_index is not None:
+    router.subscribe(run_index, name="run_index", pages=True)
+if temporary_catalog is not None:
+    router.subscribe(temporary_catalog, name="temporary_catalog", pages=True)
+router.call_later = RE.loop.call_later  # Held events, in the RunEngine's thread.
+RE.subscribe(router)  # The session callbacks, with one subscription.
+RE.preprocessors.append(_connect_catalog)
 RE.preprocessors.append(sd)
 
 set_control_layer()
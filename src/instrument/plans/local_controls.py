@@ -8,8 +8,10 @@ EXAMPLE::
 .. rubric:: Bluesky Plan Stubs
 .. autosummary::
 
+    ~call_in_thread
     ~change_motor_srev
     ~change_noisy_signal_parameters
+    ~connect_devices
     ~enable_user_calcs
     ~setup_area_detectors
     ~setup_devices
@@ -19,18 +21,26 @@ EXAMPLE::
     ~setup_shutter
     ~setup_temperature_positioner
 
+.. rubric:: Setup steps
+.. autosummary::
+
+    ~SETUP_STEPS
 """
 
+import asyncio
+import concurrent.futures
 import logging
 import sys
 
 import numpy
 from apstools.devices import setup_lorentzian_swait
-from apstools.plans import run_blocking_function
 from bluesky import plan_stubs as bps
 from ophydregistry.exceptions import ComponentNotFound
 
 from ..utils.controls_setup import oregistry  # noqa: F401
+from ..utils.controls_setup import wait_for_connections
+from ..utils.plan_scheduler import run_in_dependency_order
+from ..utils.startup_profiler import profiler
 from .ad_support import ad_peak_simulation
 from .ad_support import change_ad_simulated_image_parameters
 from .ad_support import dither_ad_peak_position
@@ -38,6 +48,21 @@ from .ad_support import dither_ad_peak_position
 logger = logging.getLogger(__name__)
 logger.bsdev(__file__)
 main_namespace = sys.modules["__main__"]
+_executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="setup_devices")
+
+
+def call_in_thread(function, *args, **kwargs):
+    """
+    Call a blocking function in a thread, without blocking the RunEngine.
+
+    Returns the function's result (or raises its exception).  Waits with
+    one ``bps.wait_for()`` (not ``bps.sleep()`` polling, as
+    ``run_blocking_function()`` does), so :func:`setup_devices` can wait
+    for the blocking functions of several steps at the same time.
+    """
+    future = _executor.submit(function, *args, **kwargs)
+    yield from bps.wait_for([lambda: asyncio.wrap_future(future)])
+    return future.result()
 
 
 def change_noisy_signal_parameters(
@@ -53,13 +78,12 @@ def change_noisy_signal_parameters(
     logger.info("change_noisy_signal_parameters()")
     m1 = oregistry["m1"]
     user_calcs = oregistry["user_calcs"]
-    for obj in (m1, user_calcs):
-        obj.wait_for_connection()
+    yield from connect_devices(m1, user_calcs)
 
     yield from bps.mv(user_calcs.enable, 1)
 
-    yield from run_blocking_function(user_calcs.calc1.reset)
-    yield from run_blocking_function(
+    yield from call_in_thread(user_calcs.calc1.reset)
+    yield from call_in_thread(
         setup_lorentzian_swait,
         user_calcs.calc1,
         m1.user_readback,
@@ -70,26 +94,40 @@ def change_noisy_signal_parameters(
     )
 
 
+def connect_devices(*devices, timeout=None):
+    """
+    Wait for the devices to connect, without blocking the RunEngine.
+
+    Raises ``TimeoutError`` if any device is not connected in time.
+    """
+    late = []
+
+    def waiter():
+        late.extend(wait_for_connections(devices, timeout=timeout))
+
+    yield from call_in_thread(waiter)
+    if len(late) > 0:
+        raise TimeoutError(f"Not connected: {', '.join(late)}")
+
+
 def enable_user_calcs():
     """Enable all the user calcs, calcouts, sseqs, and transforms."""
     logger.info("enable_user_calcs()")
-    for key in "user_calcouts user_calcs user_sseqs user_transforms".split():
-        obj = oregistry.find(name=key, allow_none=True)
-        if obj is not None:
-            obj.wait_for_connection()
-            logger.debug("Enable %r", key)
-            yield from bps.mv(obj.enable, 1)
+    keys = "user_calcouts user_calcs user_sseqs user_transforms".split()
+    objects = [oregistry.find(name=key, allow_none=True) for key in keys]
+    objects = [obj for obj in objects if obj is not None]
+    yield from connect_devices(*objects)
+    for obj in objects:
+        logger.debug("Enable %r", obj.name)
+        yield from bps.mv(obj.enable, 1)
 
 
 def setup_area_detectors():
     """Setup the area detectors."""
     logger.info("setup_area_detectors()")
-    yield from bps.null()
     ad_transform = oregistry["ad_transform"]
     adsimdet = oregistry["adsimdet"]
-    for obj in (ad_transform, adsimdet):
-        obj.wait_for_connection()
-        logger.debug("Setup %r", obj.name)
+    yield from connect_devices(ad_transform, adsimdet)
 
     try:
         yield from change_ad_simulated_image_parameters(adsimdet)
@@ -103,25 +141,27 @@ def setup_area_detectors():
         print(f"Peak Dithering setup failed: {reason}")
 
 
-def setup_devices(*, extra_wait: float = 1):
-    """Initialize all the local controls (with default settings)."""
+def setup_devices(*, extra_wait: float = 1, concurrent: bool = True):
+    """
+    Initialize all the local controls (with default settings).
+
+    Each step in :data:`SETUP_STEPS` starts once the steps it depends on
+    have finished.  Independent steps run concurrently (unless
+    ``concurrent=False``): their blocking functions (see
+    :func:`call_in_thread`) and moves overlap.  A step that fails (device
+    not found or not connected) is logged, and the steps that depend on it
+    are skipped.
+    """
     logger.info("Starting local controls setup.")
 
-    # Order is important here.
-    try:
-        yield from setup_scan_id()
-        yield from enable_user_calcs()
-        yield from change_motor_srev()
-        yield from setup_scaler1()
-        yield from change_noisy_signal_parameters()
-        yield from setup_shutter()
-        yield from setup_monochromator()
-        yield from setup_diffractometers()
-        yield from setup_temperature_positioner()
-        yield from setup_area_detectors()
-        logger.info("Local controls setup finished.")
-    except (ComponentNotFound, TimeoutError) as reason:
-        logger.warning("Problem during setup_devices(): %s", reason)
+    durations = yield from run_in_dependency_order(
+        SETUP_STEPS,
+        tolerate=(ComponentNotFound, TimeoutError),
+        concurrent=concurrent,
+    )
+    for name, duration in durations.items():
+        profiler.record(f"setup_devices:{name}", duration)
+    logger.info("Local controls setup finished.")
 
 
 def setup_diffractometers():
@@ -133,18 +173,18 @@ def setup_diffractometers():
         if obj is None:
             logger.debug("No %r diffractometer.", key)
             return
-        obj.wait_for_connection()
+        obj.wait_for_connection()  # Already in a thread, not blocking RE.
         obj._update_calc_energy()
 
     for key in ("fourc", "sixc"):
-        yield from run_blocking_function(_internal, key)
+        yield from call_in_thread(_internal, key)
 
 
 def setup_monochromator():
     """Setup the monochromator."""
     logger.info("setup_monochromator()")
     dcm = oregistry["dcm"]
-    dcm.wait_for_connection()
+    yield from connect_devices(dcm)
     logger.debug("Setup the monochromator")
 
     yield from dcm.into_control_range(p_theta=2, p_y=-5, p_z=5)
@@ -161,11 +201,15 @@ def change_motor_srev(srev=2_000):
     """
     logger.info("change_motor_srev()")
 
-    for motor in oregistry.findall(label="motor"):
-        if "steps_per_revolution" in dir(motor):
-            motor.wait_for_connection()
-            logger.debug("Set %r SREV to %f steps/rev", motor.name, srev)
-            yield from bps.mv(motor.steps_per_revolution, srev)
+    motors = [
+        motor
+        for motor in oregistry.findall(label="motor")
+        if "steps_per_revolution" in dir(motor)
+    ]
+    yield from connect_devices(*motors)
+    for motor in motors:
+        logger.debug("Set %r SREV to %f steps/rev", motor.name, srev)
+        yield from bps.mv(motor.steps_per_revolution, srev)
 
 
 def setup_scaler1():
@@ -180,7 +224,7 @@ def setup_scaler1():
     logger.info("setup_scaler1()")
 
     scaler1 = oregistry["scaler1"]
-    scaler1.wait_for_connection()
+    yield from connect_devices(scaler1)
     logger.debug("Setup custom scaler channels")
 
     if not len(scaler1.channels.chan01.chname.get()):
@@ -226,12 +270,12 @@ def setup_scaler1():
 
 def setup_scan_id():
     """Set scan_id PV to number of runs in current catalog."""
-    from ..core.catalog_init import cat
+    from ..core.catalog_init import run_counter
 
     logger.info("setup_scan_id()")
     scan_id_epics = oregistry["scan_id_epics"]
     if scan_id_epics.connected:
-        yield from bps.mv(scan_id_epics, len(cat))
+        yield from bps.mv(scan_id_epics, len(run_counter))
     else:
         logger.warning(f"PV: {scan_id_epics.pvname} not connected, 'scan_id' reset.")
 
@@ -243,11 +287,10 @@ def setup_shutter(delay=0.05):
     Simulate a shutter that needs a finite recovery time after moving.
     """
     logger.info("setup_shutter()")
-    yield from bps.null()  # makes it a plan (generator function)
     logger.debug("Setup shutter")
 
     shutter = oregistry["shutter"]
-    shutter.wait_for_connection()
+    yield from connect_devices(shutter)
     shutter.delay_s = delay
 
 
@@ -256,8 +299,8 @@ def setup_temperature_positioner():
     logger.info("setup_temperature_positioner()")
     logger.debug("Setup temperature controller (positioner)")
     temperature = oregistry["temperature"]
-    temperature.wait_for_connection()
-    yield from run_blocking_function(
+    yield from connect_devices(temperature)
+    yield from call_in_thread(
         temperature.setup_temperature,
         setpoint=25,
         noise=1,
@@ -266,3 +309,19 @@ def setup_temperature_positioner():
         max_change=2,
         report_dmov_changes=False,
     )
+
+
+SETUP_STEPS = {
+    # plan stub: [plan stubs that must finish first]
+    setup_scan_id: [],
+    enable_user_calcs: [],
+    change_motor_srev: [],
+    setup_scaler1: [],
+    change_noisy_signal_parameters: [enable_user_calcs],
+    setup_shutter: [],
+    setup_monochromator: [change_motor_srev],
+    setup_diffractometers: [setup_monochromator],
+    setup_temperature_positioner: [enable_user_calcs],
+    setup_area_detectors: [enable_user_calcs],
+}
+"""Steps of :func:`setup_devices` and the steps each depends on."""
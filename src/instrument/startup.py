@@ -11,11 +11,17 @@ Includes:
 
 import logging
 
-from .core.best_effort_init import bec  # noqa: F401
-from .core.best_effort_init import peaks  # noqa: F401
-from .core.catalog_init import cat  # noqa: F401
-from .core.run_engine_init import RE  # noqa: F401
-from .core.run_engine_init import sd  # noqa: F401
+from .utils.startup_profiler import profiler
+from .utils.startup_profiler import timed_plan
+
+with profiler.phase("core.best_effort_init"):
+    from .core.best_effort_init import bec  # noqa: F401
+    from .core.best_effort_init import peaks  # noqa: F401
+with profiler.phase("core.catalog_init"):
+    from .core.catalog_init import cat  # noqa: F401
+with profiler.phase("core.run_engine_init"):
+    from .core.run_engine_init import RE  # noqa: F401
+    from .core.run_engine_init import sd  # noqa: F401
 from .devices import *  # noqa: F403
 from .plans import *  # noqa: F403
 
@@ -33,12 +39,14 @@ if iconfig.get("USE_BLUESKY_MAGICS", False):
 
 # Configure the session with callbacks, devices, and plans.
 if iconfig.get("NEXUS_DATA_FILES") is not None:
-    from .callbacks.nexus_data_file_writer import nxwriter  # noqa: F401
+    with profiler.phase("callbacks.nexus_data_file_writer"):
+        from .callbacks.nexus_data_file_writer import nxwriter  # noqa: F401
 
 if iconfig.get("SPEC_DATA_FILES") is not None:
-    from .callbacks.spec_data_file_writer import newSpecFile  # noqa: F401
-    from .callbacks.spec_data_file_writer import spec_comment  # noqa: F401
-    from .callbacks.spec_data_file_writer import specwriter  # noqa: F401
+    with profiler.phase("callbacks.spec_data_file_writer"):
+        from .callbacks.spec_data_file_writer import newSpecFile  # noqa: F401
+        from .callbacks.spec_data_file_writer import spec_comment  # noqa: F401
+        from .callbacks.spec_data_file_writer import specwriter  # noqa: F401
 
 if iconfig.get("USE_BLUESKY_MAGICS", False):
     register_bluesky_magics()
@@ -53,8 +61,9 @@ if running_in_queueserver():
 else:
     # Import bluesky plans and stubs with prefixes set by common conventions.
     # The apstools plans and utils are imported by '*'.
-    from apstools.plans import *  # noqa: F403
-    from apstools.utils import *  # noqa: F403
+    with profiler.phase("apstools star-imports"):
+        from apstools.plans import *  # noqa: F403
+        from apstools.utils import *  # noqa: F403
     from bluesky import plan_stubs as bps  # noqa: F401
     from bluesky import plans as bp  # noqa: F401
 
@@ -67,9 +76,15 @@ def prepare_controls():
     """Get the local controls here."""
     from .plans.local_controls import setup_devices
 
-    yield from make_devices()
-    yield from setup_devices()
+    yield from timed_plan("make_devices", make_devices())
+    if iconfig.get("MAKE_DEVICES", {}).get("LAZY", False):
+        # setup_devices() uses most devices, which would create them all now.
+        logger.info("Lazy devices: run 'RE(setup_devices())' when needed.")
+    else:
+        yield from timed_plan("setup_devices", setup_devices())
 
 
 RE(prepare_controls())  # create all the ophyd-style control devices
+if profiler.enabled:
+    profiler.write_report()
 logger.info("%s Bluesky session ready to use.", "*" * 40)
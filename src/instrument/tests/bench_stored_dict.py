@@ -0,0 +1,87 @@
+"""
+Benchmark the utils.stored_dict module.
+
+Not collected by pytest directly.  Run (compare with the baseline)::
+
+    python -m instrument.tests.bench_stored_dict
+
+or, as a pytest test (skipped unless ``BENCHMARK`` is set)::
+
+    BENCHMARK=1 pytest -k benchmark
+
+A result slower than ``TOLERANCE`` times its ``BASELINE`` is a regression.
+Update ``BASELINE`` (microseconds per call) when the code is made faster,
+or when the reference machine changes.
+"""
+
+import os
+import pathlib
+import sys
+import tempfile
+import timeit
+
+from ..utils.stored_dict import StoredDict
+
+NUMBER = 10_000
+BULK = {f"key_{i}": {"value": i, "list": [i, str(i), None]} for i in range(100)}
+BASELINE = {  # microseconds per call
+    "setitem: scan_id": 3.1,
+    "setitem: nested value": 190,
+    "update: 100 keys": 620,
+    "setitem: 100 keys, one at a time": 840,
+}
+TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", 2))
+
+
+def bench(label, statement, number=NUMBER):
+    """Print the mean time (us) of one call of 'statement', return it."""
+    best = min(timeit.repeat(statement, number=number, repeat=5))
+    microseconds = 1e6 * best / number
+    print(f"{label:<40s} {microseconds:10.2f} us  (baseline {BASELINE[label]} us)")
+    return microseconds
+
+
+def run_benchmarks():
+    """Time the common ways to write to a StoredDict, return {label: us}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        sdict = StoredDict(pathlib.Path(tmp) / "md.yml", delay=60)
+        counter = iter(range(10**9))
+
+        results["setitem: scan_id"] = bench(
+            "setitem: scan_id", lambda: sdict.__setitem__("scan_id", next(counter))
+        )
+        results["setitem: nested value"] = bench(
+            "setitem: nested value", lambda: sdict.__setitem__("bulk", BULK)
+        )
+        results["update: 100 keys"] = bench(
+            "update: 100 keys", lambda: sdict.update(BULK), number=NUMBER // 10
+        )
+        results["setitem: 100 keys, one at a time"] = bench(
+            "setitem: 100 keys, one at a time",
+            lambda: [sdict.__setitem__(k, v) for k, v in BULK.items()],
+            number=NUMBER // 10,
+        )
+        sdict.close()
+    return results
+
+
+def regressions(results, tolerance=TOLERANCE):
+    """Labels of the results slower than 'tolerance' times the baseline."""
+    return [
+        label
+        for label, microseconds in results.items()
+        if microseconds > tolerance * BASELINE[label]
+    ]
+
+
+def main():
+    """Run the benchmarks, exit with an error if any regressed."""
+    slow = regressions(run_benchmarks())
+    if len(slow) > 0:
+        print(f"Slower than {TOLERANCE} x baseline: {slow}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
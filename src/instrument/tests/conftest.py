@@ -0,0 +1,74 @@
+"""
+Shared test fixtures.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeCatalog:
+    """
+    Just enough of a databroker (msgpack) catalog for the tests.
+
+    Runs (by uid, oldest first) with their start and stop documents, the
+    msgpack ``paths``, ``v1.insert``, and a count of the calls to ``len()``.
+    With ``lagging``, an inserted run is listed only after its stop document
+    (as a msgpack catalog, until its file is written).
+    """
+
+    name = "fake"
+
+    def __init__(self, directory=".", lagging=False):
+        """No runs yet, msgpack files in 'directory'."""
+        self.paths = [f"{directory}/*.msgpack"]
+        self.lagging = lagging
+        self.counted = 0  # Calls to len()
+        self.inserted = []  # (name, doc) of each inserted document
+        self.v1 = SimpleNamespace(insert=self.insert)
+        self._entries = {}  # {uid: run}
+        self._uid_to_run_start_doc = {}
+        self._started = {}  # {uid: start document} of inserted runs
+
+    def __contains__(self, uid):
+        """Is the run in the catalog?"""
+        return uid in self._entries
+
+    def __getitem__(self, key):
+        """A run, by uid or by position (such as ``cat[-1]``)."""
+        if isinstance(key, int):
+            key = list(self._entries)[key]  # IndexError when empty
+        return self._entries[key]
+
+    def __iter__(self):
+        """The uids of the runs."""
+        return iter(list(self._entries))
+
+    def __len__(self):
+        """Count the runs (as len(cat) would)."""
+        self.counted += 1
+        return len(self._entries)
+
+    def add(self, start, stop=None):
+        """Add a run from its start (and stop) documents."""
+        uid = start["uid"]
+        self._uid_to_run_start_doc[uid] = start
+        self._entries[uid] = SimpleNamespace(metadata=dict(start=start, stop=stop))
+
+    def insert(self, name, doc):
+        """Insert a document (as ``v1.insert``)."""
+        self.inserted.append((name, doc))
+        if name == "start":
+            self._started[doc["uid"]] = doc
+            if not self.lagging:
+                self.add(doc)
+        elif name == "stop":
+            start = self._started.pop(doc["run_start"], None)
+            if start is not None:
+                self.add(start, doc)
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    """An empty FakeCatalog, its msgpack files in 'tmp_path'."""
+    return FakeCatalog(tmp_path)
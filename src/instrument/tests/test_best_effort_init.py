@@ -0,0 +1,54 @@
+"""
+Test the core.best_effort_init module.
+"""
+
+import types
+
+import pytest
+
+pytest.importorskip("bluesky.callbacks.best_effort")
+
+from ..core.best_effort_init import _throttle_plot  # noqa: E402
+from ..core.best_effort_init import _throttle_table  # noqa: E402
+
+
+def test_throttle_table():
+    """Few table rows for fast events, always the last one."""
+    rows = []
+    table = types.SimpleNamespace(
+        event=lambda doc: rows.append(doc["seq_num"]),
+        stop=lambda doc: rows.append("stop"),
+    )
+    _throttle_table(table, max_rate=0.001)
+    for n in range(1, 11):
+        table.event({"seq_num": n})
+    table.stop({})
+    assert rows == [1, 10, "stop"]
+
+
+def test_throttle_plot():
+    """Redraw every few events and at stop, with fewer points."""
+    drawn = []
+    live_plot = types.SimpleNamespace(
+        x_data=[],
+        y_data=[],
+        current_line=types.SimpleNamespace(set_data=lambda x, y: drawn.append(list(x))),
+        ax=types.SimpleNamespace(
+            relim=lambda **kwargs: None,
+            autoscale_view=lambda **kwargs: None,
+            figure=types.SimpleNamespace(
+                canvas=types.SimpleNamespace(draw_idle=lambda: None)
+            ),
+        ),
+        stop=lambda doc: None,
+    )
+    _throttle_plot(live_plot, redraw_every=4, max_points=5)
+    for n in range(10):
+        live_plot.x_data.append(n)
+        live_plot.y_data.append(n * n)
+        live_plot.update_plot()
+    live_plot.stop({})
+
+    assert len(drawn) == 3  # After events 4 & 8, then at stop.
+    assert drawn[0] == [0, 1, 2, 3]
+    assert drawn[-1] == [1, 3, 5, 7, 9]  # All 10 points would be too many.
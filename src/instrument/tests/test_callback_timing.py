@@ -0,0 +1,83 @@
+"""
+Test the utils.callback_timing module.
+"""
+
+import time
+
+import pytest
+
+from ..utils.callback_timing import REPORT_FIELDS
+from ..utils.callback_timing import CallbackTimings
+from ..utils.callback_timing import callback_name
+from ..utils.callback_timing import time_subscriptions
+
+
+class Writer:
+    """A callback object, with a method."""
+
+    def receiver(self, name, doc):
+        """Slow for events."""
+        if name == "event":
+            time.sleep(0.002)
+
+    def __call__(self, name, doc):
+        """Fast."""
+
+
+@pytest.mark.parametrize(
+    "callback, expected",
+    [
+        [Writer().receiver, "Writer.receiver"],
+        [Writer(), "Writer"],
+        [print, "print"],
+    ],
+)
+def test_callback_name(callback, expected):
+    """Short names of callbacks."""
+    assert callback_name(callback) == expected
+
+
+def test_CallbackTimings(caplog):
+    """Time each callback, by document type; log & report the slowest."""
+    timings = CallbackTimings(log_interval=None)
+    writer = Writer()
+    subscribed = []
+
+    class FakeRunEngine:
+        def subscribe(self, func, name="all"):
+            subscribed.append(func)
+            return len(subscribed)
+
+    RE = FakeRunEngine()
+    router = Writer()  # Its own callbacks are timed.
+    time_subscriptions(RE, timings, exclude=[router])
+    assert RE.subscribe(writer.receiver) == 1
+    assert RE.subscribe(writer) == 2
+    assert subscribed[0].__wrapped__ == writer.receiver
+    assert RE.subscribe(router) == 3
+    assert subscribed.pop() is router  # Not timed.
+
+    for cb in subscribed:
+        cb("start", {})
+        for _ in range(3):
+            cb("event", {})
+        cb("stop", {})
+
+    rows = timings.rows()
+    assert len(rows) == 6
+    assert rows[0]["callback"] == "Writer.receiver"  # Slowest first.
+    assert rows[0]["document"] == "event"
+    assert rows[0]["count"] == 3
+    assert 2 <= rows[0]["mean_ms"] <= rows[0]["max_ms"]
+    assert rows[0]["p50_ms"] <= rows[0]["max_ms"]
+
+    report = timings.report().splitlines()
+    assert report[0].split() == REPORT_FIELDS
+    assert report[1].split()[:3] == ["Writer.receiver", "event", "3"]
+
+    caplog.set_level("INFO")
+    timings.log_summary()
+    assert "Writer.receiver/event n=3" in caplog.text
+
+    timings.reset()
+    assert timings.rows() == []
@@ -0,0 +1,42 @@
+"""
+Test the callbacks.catalog_inserter module.
+"""
+
+import pytest
+
+pytest.importorskip("event_model")
+
+from ..callbacks.catalog_inserter import BufferedInserter  # noqa: E402
+
+
+def test_BufferedInserter():
+    """Consecutive events become pages, other documents keep their order."""
+    inserted = []
+    inserter = BufferedInserter(lambda *args: inserted.append(args), max_events=3)
+
+    def event(descriptor, n):
+        return dict(
+            descriptor=descriptor,
+            uid=f"{descriptor}{n}",
+            seq_num=n,
+            time=n,
+            data={"x": n},
+            timestamps={"x": n},
+        )
+
+    inserter("start", {})
+    inserter("descriptor", {"uid": "a"})
+    for n in range(1, 5):
+        inserter("event", event("a", n))
+    assert [name for name, _ in inserted] == "start descriptor event_page".split()
+    assert inserted[-1][1]["data"] == {"x": [1, 2, 3]}  # max_events
+    inserter("event", event("b", 1))  # Another stream: new page.
+    assert len(inserted) == 4
+
+    inserter("stop", {})
+    names = [name for name, _ in inserted]
+    assert names[2:] == "event_page event_page event_page stop".split()
+    assert inserted[3][1]["seq_num"] == [4]
+    assert inserted[4][1]["descriptor"] == "b"
+    inserter.flush()  # Nothing buffered: no insert.
+    assert len(inserted) == 6
@@ -0,0 +1,39 @@
+"""
+Test the utils.config_loaders module.
+"""
+
+import os
+
+import pytest
+
+from ..utils.config_loaders import load_config_yaml
+
+
+def test_cached_yaml(tmp_path):
+    """Parsed files are cached until they change."""
+    path = tmp_path / "config.yml"
+    path.write_text("a: 1\nb: [1, 2]\n")
+
+    first = load_config_yaml(path)
+    assert first == {"a": 1, "b": [1, 2]}
+    first["b"].append(3)  # A copy, the cache is not changed.
+    assert load_config_yaml(path) == {"a": 1, "b": [1, 2]}
+
+    view = load_config_yaml(path, copy=False)
+    assert dict(view) == {"a": 1, "b": [1, 2]}
+    with pytest.raises(TypeError):
+        view["a"] = 2
+
+    # Replace the file (same size, same mtime): parsed again.
+    stat = os.stat(path)
+    replacement = tmp_path / "new.yml"
+    replacement.write_text("a: 2\nb: [1, 2]\n")
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(replacement, path)
+    assert load_config_yaml(path)["a"] == 2
+
+
+def test_missing_yaml(tmp_path):
+    """A missing file is reported."""
+    with pytest.raises(FileExistsError):
+        load_config_yaml(tmp_path / "missing.yml")
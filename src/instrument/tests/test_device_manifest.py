@@ -0,0 +1,45 @@
+"""
+Test the utils.device_manifest module.
+"""
+
+import pytest
+
+from ..utils.device_manifest import ManifestCache
+from ..utils.device_manifest import file_digest
+
+
+@pytest.mark.parametrize("use_disk", [True, False])
+def test_ManifestCache(tmp_path, use_disk):
+    """Manifests are found until the YAML file changes."""
+    yml = tmp_path / "devices.yml"
+    yml.write_text("ophyd.Signal: [{name: s1}]\n")
+    digest = file_digest(yml)
+
+    directory = tmp_path / "cache" if use_disk else None
+    cache = ManifestCache(directory)
+    assert cache.get(yml, digest) is None
+
+    entries = [{"device_class": "ophyd.Signal", "kwargs": {"name": "s1"}}]
+    imports = {"ophyd.Signal": "ophyd.signal.Signal"}
+    cache.put(yml, digest, entries, imports)
+    assert cache.get(yml, digest)["entries"] == entries
+    if use_disk:
+        assert cache.cache_file(yml).exists()
+
+    # A new session (empty memory) uses the file on disk.
+    manifest = ManifestCache(directory).get(yml, digest)
+    if use_disk:
+        assert manifest["imports"] == imports
+    else:
+        assert manifest is None
+
+    # Same content as parsed (such as int keys and tuples).
+    if use_disk:
+        parsed = [{"device_class": "apstools.devices.X", "kwargs": {1: (2, 3)}}]
+        cache.put(yml, digest, parsed, imports)
+        assert ManifestCache(directory).get(yml, digest)["entries"] == parsed
+
+    # Stale when the YAML file changes.
+    yml.write_text("ophyd.Signal: [{name: s2}]\n")
+    assert file_digest(yml) != digest
+    assert cache.get(yml, file_digest(yml)) is None
@@ -0,0 +1,117 @@
+"""
+Test the core.document_router module.
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("event_model")
+
+from ..core.document_router import SessionRouter  # noqa: E402
+
+
+def event(descriptor, n):
+    """An event document."""
+    return dict(
+        descriptor=descriptor,
+        uid=f"{descriptor}{n}",
+        seq_num=n,
+        time=n,
+        data={"x": n},
+        timestamps={"x": n},
+        filled={},
+    )
+
+
+def test_SessionRouter():
+    """Each callback gets all documents, in order, as pages or events."""
+    pages, events = [], []
+    router = SessionRouter({"pages": {"BATCH_SIZE": 3, "LATENCY": 10}})
+    router.subscribe(lambda *args: pages.append(args), name="pages", pages=True)
+    router.subscribe(lambda *args: events.append(args), name="events")
+
+    router("start", {})
+    router("descriptor", {"uid": "a"})
+    for n in range(1, 6):
+        router("event", event("a", n))
+    page = dict(
+        descriptor="a",
+        uid=["a6"],
+        seq_num=[6],
+        time=[6],
+        data={"x": [6]},
+        timestamps={"x": [6]},
+    )
+    router("event_page", page)
+    router("stop", {})
+
+    # The first event comes at once (no events before it).
+    names = [name for name, _ in pages]
+    assert names[:3] == "start descriptor event".split()
+    assert names[3:] == "event_page event_page event_page stop".split()
+    assert pages[3][1]["seq_num"] == [2, 3, 4]  # batch_size
+    assert pages[4][1]["seq_num"] == [5]  # held until the next document
+    assert pages[5][1]["seq_num"] == [6]
+
+    names = [name for name, _ in events]
+    assert names == ["start", "descriptor"] + 6 * ["event"] + ["stop"]
+    assert [doc["seq_num"] for _, doc in events[2:-1]] == list(range(1, 7))
+
+
+def test_latency():
+    """Events are not held longer than the latency."""
+    received = []
+    router = SessionRouter()
+    router.subscribe(
+        lambda *args: received.append(args),
+        name="slow",
+        batch_size=100,
+        latency=0.05,
+    )
+    router.subscribe(print, name="fast")
+    router.unsubscribe("fast")
+    assert "fast" not in repr(router)
+
+    router("event", event("a", 1))
+    router("event", event("a", 2))
+    assert len(received) == 1  # Second one is held.
+    time.sleep(0.1)
+    assert len(received) == 2  # Delivered by the timer, no other document.
+    router("event", event("a", 3))  # After a pause: delivered at once.
+    assert len(received) == 3
+
+
+class FakeTimer:
+    """Called (by the test) instead of after a delay."""
+
+    def __init__(self, delay, func):
+        """Remember the function."""
+        self.delay = delay
+        self.func = func
+        self.cancelled = False
+
+    def cancel(self):
+        """Do not call the function."""
+        self.cancelled = True
+
+
+def test_call_later():
+    """Held events are delivered by 'call_later', which is cancelled if unused."""
+    received, timers = [], []
+    router = SessionRouter()
+    router.call_later = lambda *args: timers.append(FakeTimer(*args)) or timers[-1]
+    router.subscribe(lambda *args: received.append(args), batch_size=10, latency=5)
+
+    router("event", event("a", 1))
+    router("event", event("a", 2))
+    router("event", event("a", 3))
+    assert len(received) == 1
+    assert [timer.delay for timer in timers] == [5]  # One for the held events.
+    timers[0].func()  # As if 5 s passed.
+    assert [doc["seq_num"] for _, doc in received] == [1, 2, 3]
+
+    router("event", event("a", 4))
+    router("stop", {})  # Delivers event 4: its timer is not needed.
+    assert timers[1].cancelled
+    assert [name for name, _ in received[-2:]] == ["event", "stop"]
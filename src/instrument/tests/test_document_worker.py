@@ -0,0 +1,17 @@
+"""
+Test the callbacks.document_worker module.
+"""
+
+import pytest
+
+from ..callbacks.document_worker import make_consumer
+
+
+def test_make_consumer():
+    """Callbacks by name, or from 'module:function'."""
+    callback = make_consumer("collections:OrderedDict")  # Any factory.
+    assert callback == {}
+
+    with pytest.raises(KeyError) as reason:
+        make_consumer("no_such_worker")
+    assert "Unknown worker 'no_such_worker'" in str(reason)
@@ -0,0 +1,47 @@
+"""
+Test the utils.lazy_catalog module.
+"""
+
+import threading
+
+import pytest
+
+from ..utils.lazy_catalog import LazyCatalog
+
+
+def test_LazyCatalog(catalog):
+    """Connect in the background, wait only when used."""
+    release = threading.Event()
+    catalog.add({"uid": "a"})
+
+    def connect():
+        release.wait(5)
+        return catalog
+
+    cat = LazyCatalog(connect)
+    cat.start()
+    assert not cat.connected
+    assert "not connected" in repr(cat)
+    with pytest.raises(TimeoutError):
+        cat.get(timeout=0.01)
+
+    release.set()
+    cat.insert("start", {"uid": "b"})  # Waits for the connection.
+    assert cat.connected
+    assert cat.get() is catalog
+    assert catalog.inserted == [("start", {"uid": "b"})]
+    assert cat.name == "fake"
+    assert cat["a"] is catalog["a"]
+    assert len(cat) == 2
+    assert "a" in cat
+
+
+def test_LazyCatalog_error():
+    """The connection error is raised when the catalog is used."""
+
+    def connect():
+        raise KeyError("no such catalog")
+
+    cat = LazyCatalog(connect)
+    with pytest.raises(KeyError):
+        len(cat)
@@ -0,0 +1,52 @@
+"""
+Test the utils.lazy_devices module.
+"""
+
+import types
+
+from ..utils.lazy_devices import LazyDevice
+
+
+class Gadget:
+    """A simple device-like object."""
+
+    def __init__(self, name=""):
+        """Remember the name."""
+        self.name = name
+        self.connected = False
+        self.value = 0
+
+    def wait_for_connection(self):
+        """Pretend to connect."""
+        self.connected = True
+
+
+def test_LazyDevice():
+    """Device is created only when first used."""
+    calls = []
+
+    def creator():
+        calls.append(1)
+        return Gadget(name="gadget")
+
+    namespace = types.SimpleNamespace()
+    proxy = LazyDevice("gadget", creator, labels=["gizmo"], namespace=namespace)
+    namespace.gadget = proxy
+
+    assert proxy.name == "gadget"
+    assert proxy._ophyd_labels_ == {"gizmo"}
+    assert proxy.parent is None
+    assert not proxy.created
+    assert "not created yet" in repr(proxy)
+    assert len(calls) == 0
+
+    assert proxy.value == 0  # first use
+    assert proxy.created
+    assert proxy.connected
+    assert len(calls) == 1
+    assert isinstance(namespace.gadget, Gadget)  # proxy replaced
+
+    proxy.value = 5  # forwarded to the device
+    assert namespace.gadget.value == 5
+    assert proxy.build() is namespace.gadget
+    assert len(calls) == 1  # created only once
@@ -0,0 +1,19 @@
+"""
+Test the utils.metadata module.
+"""
+
+import sys
+
+from ..utils import metadata
+
+
+def test_versions():
+    """Versions are read from package metadata."""
+    versions = metadata.get_versions()
+    assert versions["python"] == sys.version.split(" ")[0]
+    assert metadata.VERSIONS == versions
+    assert set(versions) <= set(metadata.DISTRIBUTIONS) | {"python"}
+
+    md = metadata.re_metadata()
+    assert md["versions"] == versions
+    assert "login_id" in md
@@ -0,0 +1,143 @@
+"""
+Test the utils.plan_scheduler module.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import time
+
+import pytest
+
+from ..utils.plan_scheduler import run_in_dependency_order
+
+Msg = collections.namedtuple("Msg", "command obj args kwargs run")
+
+
+def run(plan):
+    """Run a plan (without a RunEngine), return its messages and result."""
+    messages = []
+    response = None
+    while True:
+        try:
+            msg = plan.send(response)
+        except StopIteration as done:
+            return messages, done.value
+        messages.append(msg)
+        response = f"reply to {msg}"
+
+
+def run_waiting(plan):
+    """Run a plan, waiting for 'wait_for' futures (as the RunEngine does)."""
+
+    async def wait_for(factories):
+        futures = [asyncio.ensure_future(factory()) for factory in factories]
+        await asyncio.wait(futures)
+        return futures
+
+    messages = []
+    response = None
+    while True:
+        try:
+            msg = plan.send(response)
+        except StopIteration as done:
+            return messages, done.value
+        messages.append(msg)
+        response = None
+        if msg.command == "wait_for":
+            response = asyncio.run(wait_for(msg.args[0]))
+
+
+def make_blocking_step(name, executor, seconds):
+    """Return a plan stub that waits for a blocking function in a thread."""
+
+    def step():
+        future = executor.submit(time.sleep, seconds)
+        yield Msg("set", name, (), {}, None)
+        yield Msg("wait_for", None, ([lambda: asyncio.wrap_future(future)],), {}, None)
+        future.result()
+
+    step.__name__ = name
+    return step
+
+
+def make_step(name, n_msgs=2, fail=False):
+    """Return a plan stub that yields a few messages."""
+
+    def step():
+        for i in range(n_msgs):
+            reply = yield f"{name}{i}"
+            assert reply == f"reply to {name}{i}"
+        if fail:
+            raise TimeoutError(f"{name} failed")
+
+    step.__name__ = name
+    return step
+
+
+def test_dependency_order():
+    """Dependent steps start only after their prerequisites."""
+    a, b, c = make_step("a"), make_step("b"), make_step("c")
+    steps = {a: [], b: [a], c: []}
+
+    messages, durations = run(run_in_dependency_order(steps))
+    assert sorted(durations) == ["a", "b", "c"]
+    assert messages.index("a1") < messages.index("b0")
+    assert messages.index("c0") < messages.index("a1")  # concurrent
+
+    messages, _ = run(run_in_dependency_order(steps, concurrent=False))
+    assert messages == "a0 a1 b0 b1 c0 c1".split()
+
+
+def test_failed_step():
+    """Steps after a failed prerequisite are skipped, others continue."""
+    a, b, c = make_step("a", fail=True), make_step("b"), make_step("c")
+    steps = {a: [], b: [a], c: []}
+
+    messages, durations = run(run_in_dependency_order(steps, tolerate=(TimeoutError,)))
+    assert sorted(durations) == ["c"]
+    assert "b0" not in messages
+
+    with pytest.raises(TimeoutError):
+        run(run_in_dependency_order(steps))
+
+
+@pytest.mark.parametrize(
+    "deps, text",
+    [
+        ["cycle", "Circular dependencies"],
+        ["unknown", "unknown step"],
+    ],
+)
+def test_bad_steps(deps, text):
+    """Unknown or circular dependencies are rejected."""
+    a, b, x = make_step("a"), make_step("b"), make_step("x")
+    if deps == "cycle":
+        steps = {a: [b], b: [a]}
+    else:
+        steps = {a: [x]}
+    with pytest.raises(ValueError) as reason:
+        run(run_in_dependency_order(steps))
+    assert text in str(reason)
+
+
+def test_blocking_steps_overlap():
+    """Independent steps wait for their blocking functions at the same time."""
+    seconds = 0.3
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        a, b, c, d = [make_blocking_step(name, executor, seconds) for name in "abcd"]
+        steps = {a: [], b: [], c: [], d: [a]}
+
+        t0 = time.time()
+        messages, durations = run_waiting(run_in_dependency_order(steps))
+        elapsed = time.time() - t0
+        assert sorted(durations) == list("abcd")
+        wait_fors = [msg for msg in messages if msg.command == "wait_for"]
+        assert [len(msg.args[0]) for msg in wait_fors] == [3, 1]  # a+b+c, then d
+        assert elapsed < 3 * seconds  # Not the serial sum (4 * seconds).
+
+        t0 = time.time()
+        messages, _ = run_waiting(run_in_dependency_order(steps, concurrent=False))
+        elapsed = time.time() - t0
+        assert len([msg for msg in messages if msg.command == "wait_for"]) == 4
+        assert elapsed >= 4 * seconds
@@ -0,0 +1,29 @@
+"""
+Test the utils.process_supervisor module.
+"""
+
+import sys
+import time
+
+from ..utils.process_supervisor import ProcessSupervisor
+
+
+def test_ProcessSupervisor(tmp_path):
+    """Processes are restarted when they exit, stopped at the end."""
+    supervisor = ProcessSupervisor(log_directory=tmp_path, restart_delay=0.1)
+    supervisor.add("sleeper", [sys.executable, "-c", "import time; time.sleep(60)"])
+    supervisor.add("quitter", [sys.executable, "-c", "print('bye')"])
+    supervisor.start()
+
+    deadline = time.monotonic() + 10
+    while supervisor.status()["quitter"]["restarts"] < 2:
+        assert time.monotonic() < deadline, f"{supervisor.status()=}"
+        time.sleep(0.1)
+    status = supervisor.status()
+    assert status["sleeper"]["returncode"] is None  # Still running.
+    assert status["sleeper"]["restarts"] == 0
+    assert (tmp_path / "quitter.log").read_text().count("bye") >= 2
+
+    supervisor.stop()
+    status = supervisor.status()
+    assert status["sleeper"]["returncode"] is not None  # Stopped.
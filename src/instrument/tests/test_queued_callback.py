@@ -0,0 +1,63 @@
+"""
+Test the callbacks.queued_callback module.
+"""
+
+import threading
+import time
+
+from ..callbacks.queued_callback import QueuedCallback
+
+
+def test_queued_callback():
+    """Documents are handled in order, in another thread, then flushed."""
+    received, flushes, threads = [], [], set()
+    release = threading.Event()
+
+    def callback(name, doc):
+        release.wait(timeout=5)  # Let documents accumulate (a batch).
+        threads.add(threading.current_thread().name)
+        received.append((name, doc["n"]))
+        if name == "event" and doc["n"] == 2:
+            raise ValueError("logged, not raised")
+
+    def flush():
+        flushes.append(len(received))
+
+    queued = QueuedCallback(callback, flush=flush, maxsize=10, name="test_writer")
+    names = "start descriptor event event event stop".split()
+    for n, name in enumerate(names):
+        queued(name, {"n": n})
+    release.set()
+    queued.join()
+
+    assert received == list(zip(names, range(len(names)), strict=True))
+    assert threads == {"test_writer"}
+    assert 6 in flushes  # after the stop document
+    assert len(flushes) < 2 * len(names)  # batched
+
+    queued.close()
+    assert "test_writer" not in [t.name for t in threading.enumerate()]
+
+
+def test_flush_interval():
+    """With flush_interval, flush when idle, and wait for 'stop' to flush."""
+    flushes = []
+    queued = QueuedCallback(
+        lambda name, doc: None,
+        flush=lambda: flushes.append(time.monotonic()),
+        flush_interval=0.2,
+        wait_for=["stop"],
+        name="test_interval",
+    )
+    t0 = time.monotonic()
+    queued("start", {})
+    queued("event", {})
+    assert flushes == []  # Not yet.
+    time.sleep(0.4)
+    assert len(flushes) == 1  # Idle for flush_interval.
+    assert flushes[0] - t0 >= 0.2
+
+    queued("event", {})
+    queued("stop", {})  # Returns after the flush.
+    assert len(flushes) == 2
+    queued.close()
@@ -0,0 +1,55 @@
+"""
+Test the utils.rolling_catalog module.
+"""
+
+import gzip
+import os
+
+from ..utils.rolling_catalog import RollingCatalog
+
+
+def add_run(catalog, directory, uid, size, mtime):
+    """Write the 'msgpack' file of a run."""
+    path = directory / f"{uid}.msgpack"
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    catalog.add({"uid": uid})
+
+
+def test_RollingCatalog(tmp_path, catalog):
+    """Oldest runs removed (and archived) to keep within the limits."""
+    directory = tmp_path  # Of the catalog's msgpack files.
+    evicted = []
+    rolling = RollingCatalog(
+        max_runs=3,
+        max_bytes=250,
+        archive=tmp_path / "archive",
+        on_evict=evicted.append,  # Once per trim.
+    )
+    rolling("stop", {"run_start": "a"})  # No catalog yet: nothing to do.
+
+    rolling.catalog = catalog
+    for i, uid in enumerate("abc"):
+        add_run(catalog, directory, uid, 50, 1000 + i)
+    rolling("stop", {"run_start": "c"})
+    assert evicted == []
+
+    rolling("start", {"uid": "d"})
+    add_run(catalog, directory, "d", 50, 1003)
+    assert rolling.trim() == 1  # Too many runs.
+    assert evicted == [["a"]]
+    assert "a" not in catalog
+    assert not (directory / "a.msgpack").exists()
+    archived = tmp_path / "archive" / "a.msgpack.gz"
+    assert gzip.decompress(archived.read_bytes()) == b"x" * 50
+
+    add_run(catalog, directory, "e", 200, 1004)  # Too many bytes.
+    rolling("stop", {"run_start": "e"})
+    # "d" is still open: keep it.
+    assert evicted == [["a"], ["b", "c"]]
+    usage = rolling.footprint()
+    assert usage["runs"] == 2
+    assert usage["bytes"] == 250
+    assert usage["evicted"] == 3
+    assert usage["evicted_bytes"] == 150
+    assert usage["archive_bytes"] > 0
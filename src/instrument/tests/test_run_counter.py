@@ -0,0 +1,58 @@
+"""
+Test the utils.run_counter module.
+"""
+
+from ..utils.run_counter import RunCounter
+
+
+def add_runs(catalog, uids):
+    """Add runs (just their start documents) to the catalog."""
+    for uid in uids:
+        catalog.add({"uid": uid})
+
+
+def test_RunCounter(catalog):
+    """Count once, then count the inserted runs."""
+    add_runs(catalog, "ab")
+    storage = {}
+    counter = RunCounter(catalog, storage)
+    assert len(counter) == 2
+    assert catalog.counted == 1
+    assert storage == {"fake": dict(count=2, last_uid="b")}
+
+    insert = counter.counted(catalog.insert)
+    insert("start", {"uid": "c"})
+    insert("stop", {"run_start": "c"})
+    assert len(counter) == 3
+    assert catalog.counted == 1
+    assert storage["fake"] == dict(count=3, last_uid="c")
+
+    # Next session: the saved count is current.
+    counter = RunCounter(catalog, storage)
+    assert len(counter) == 3
+    assert catalog.counted == 1
+
+    # Another process added a run: count again.
+    add_runs(catalog, "d")
+    counter = RunCounter(catalog, storage)
+    assert len(counter) == 4
+    assert catalog.counted == 2
+
+
+def test_RunCounter_empty(catalog):
+    """An empty catalog, with a stale saved count."""
+    counter = RunCounter(catalog, {"fake": dict(count=5, last_uid="x")})
+    assert len(counter) == 0
+    assert counter.recount() == 0
+
+
+def test_RunCounter_lagging_catalog(catalog):
+    """Count a run not yet listed by the catalog."""
+    catalog.lagging = True  # Lists a run once its stop document arrives.
+    add_runs(catalog, "ab")
+    counter = RunCounter(catalog, {})
+    insert = counter.counted(catalog.insert)
+    for uid in "cde":
+        insert("start", {"uid": uid})
+        insert("stop", {"run_start": uid})
+    assert len(counter) == len(catalog) == 5
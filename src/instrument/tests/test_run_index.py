@@ -0,0 +1,55 @@
+"""
+Test the utils.run_index module.
+"""
+
+import pytest
+
+from ..utils.run_index import RunIndex
+
+
+def start_doc(uid, scan_id, time, plan_name="scan", **kwargs):
+    """A start document."""
+    doc = dict(uid=uid, scan_id=scan_id, time=time, plan_name=plan_name)
+    doc.update(kwargs)
+    return doc
+
+
+def test_RunIndex(tmp_path, catalog):
+    """Index runs from documents and from the catalog, then search."""
+    catalog.add(
+        start_doc("a", 1, 100.0, detectors=["noisy"], motors=["m1"]),
+        dict(run_start="a", exit_status="success", num_events={"primary": 21}),
+    )
+    index = RunIndex(tmp_path / "runs.db", catalog)
+    assert len(index) == 0
+    assert index.backfill() == 1
+    assert index.backfill() == 0  # Nothing new.
+
+    # As the RunEngine would send the documents.
+    start = start_doc("b", 2, 200.0, "rel_scan", title="Peak Search", num_points=5)
+    index("start", start)
+    index("event_page", {})
+    assert index.search(scan_id=2)[0]["exit_status"] is None
+    index("stop", dict(run_start="b", exit_status="abort", num_events={}))
+
+    assert len(index) == 2
+    assert [r["uid"] for r in index.search()] == ["b", "a"]  # most recent first
+    (found,) = index.search(title="peak")
+    assert found["num_points"] == 5
+    assert found["exit_status"] == "abort"
+    assert index.search(detector="noisy")[0]["motors"] == ["m1"]
+    assert index.search(since=150, until=250)[0]["uid"] == "b"
+    assert index.search(plan_name="count") == []
+    assert index.run(scan_id=1) is catalog["a"]
+    with pytest.raises(KeyError):
+        index.run(scan_id=3)
+    index.close()
+
+    # Another session reads the same file.
+    other = RunIndex(tmp_path / "runs.db", catalog)
+    assert len(other) == 2
+    other.remove(["a"])  # Removed from the catalog.
+    assert [r["uid"] for r in other.search()] == ["b"]
+    with pytest.raises(KeyError):
+        other.run(scan_id=1)
+    other.close()
@@ -0,0 +1,47 @@
+"""
+Test the utils.spec_scan_index module.
+"""
+
+import pytest
+
+from ..utils.spec_scan_index import SpecScanIndex
+
+HEADER = "#F {name}\n#E 1700000000\n#D Tue Nov 14 16:13:20 2023\n#C Bluesky\n"
+
+
+def scan(number, rows=2):
+    """Text of a SPEC scan."""
+    lines = ["", f"#S {number} ascan m1 0 1 {rows} 0.1", "#N 2", "#L m1  I0"]
+    lines += [f"{i} {10 * i}" for i in range(rows)]
+    return "\n".join(lines) + "\n"
+
+
+def test_index(tmp_path):
+    """Index is built, updated, and rebuilt when stale."""
+    data_file = tmp_path / "test.dat"
+    index = SpecScanIndex(data_file)
+    assert index.scan_numbers() == []
+    assert index.highest_scan_number() == 0
+
+    data_file.write_text(HEADER.format(name=data_file.name) + scan(1) + scan(2))
+    assert index.scan_numbers() == ["1", "2"]
+    assert index.index_file.exists()
+
+    with open(data_file, "a") as f:
+        f.write(scan(5, rows=3) + "#S 6 incomplete")  # last line not complete
+    assert index.scan_numbers() == ["1", "2", "5"]
+    assert index.highest_scan_number() == 5
+    assert index.read_scan(5) == scan(5, rows=3)[1:]
+
+    # Another process reads the index (does not search the whole file).
+    other = SpecScanIndex(data_file)
+    assert other.scan_numbers() == ["1", "2", "5"]
+    with pytest.raises(KeyError):
+        other.read_scan(3)
+
+    # Replace the file: rebuild the index.
+    replacement = tmp_path / "new.dat"
+    replacement.write_text(HEADER.format(name=data_file.name) + scan(7))
+    replacement.replace(data_file)
+    assert SpecScanIndex(data_file).scan_numbers() == ["7"]
+    assert index.scan_numbers() == ["7"]
@@ -0,0 +1,45 @@
+"""
+Test the utils.startup_profiler module.
+"""
+
+import json
+
+from ..utils.startup_profiler import StartupProfiler
+from ..utils.startup_profiler import compare_reports
+from ..utils.startup_profiler import main
+
+
+def test_disabled():
+    """Nothing is recorded when not enabled."""
+    profiler = StartupProfiler(enabled=False)
+    with profiler.phase("a"):
+        pass
+    assert profiler.phases == []
+
+
+def test_report(tmp_path, capsys):
+    """Write reports and compare them."""
+    reports = []
+    for phases in (["a", "b"], ["a", "c"]):
+        profiler = StartupProfiler(enabled=True)
+        with profiler.phase("outer"):
+            for name in phases:
+                with profiler.phase(name):
+                    pass
+        assert [p["depth"] for p in profiler.phases] == [0, 1, 1]
+
+        json_file = profiler.write_report(tmp_path, file_base=f"p{len(reports)}")
+        assert json_file.exists()
+        assert json_file.with_suffix(".csv").exists()
+        reports.append(json_file)
+
+    old, new = [json.loads(f.read_text()) for f in reports]
+    rows = {row[0]: row for row in compare_reports(old, new)}
+    assert list(rows) == ["outer", "a", "c", "b", "(total)"]
+    assert rows["b"][2] is None  # not in new report
+    assert rows["c"][1] is None  # not in old report
+    assert rows["a"][3] is not None
+
+    main([str(f) for f in reports])
+    out = capsys.readouterr().out
+    assert "(total)" in out
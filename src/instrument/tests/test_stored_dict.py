@@ -2,7 +2,11 @@
 Test the utils.stored_dict module.
 """
 
+import gc
+import os
 import pathlib
+import subprocess
+import sys
 import tempfile
 import time
 from contextlib import nullcontext as does_not_raise
@@ -11,6 +15,7 @@ import pytest
 
 from ..utils.config_loaders import load_config_yaml
 from ..utils.stored_dict import StoredDict
+from ..utils.stored_dict import _instances
 
 
 def luftpause(delay=0.05):
@@ -136,3 +141,110 @@ def test_repr(md_file):
     sdict["a"] = 1
     assert repr(sdict) == "<StoredDict {'a': 1}>"
     assert str(sdict) == "<StoredDict {'a': 1}>"
+
+
+def test_close(md_file):
+    """Pending changes are written on close, by one writer thread."""
+    sdict = StoredDict(md_file, delay=10, title="unit testing")
+    for i in range(5):
+        sdict[f"k{i}"] = i
+    assert sdict._sync_thread.name == sdict._sync_key
+    assert sdict.sync_in_progress
+    assert load_config_yaml(md_file) is None  # not written yet
+
+    sdict.close()
+    assert not sdict.sync_in_progress
+    assert not sdict._sync_thread.is_alive()
+    assert load_config_yaml(md_file) == {f"k{i}": i for i in range(5)}
+    assert list(md_file.parent.glob(f".{md_file.name}.*")) == []  # no temp files
+
+    with pytest.raises(ValueError, match="is closed"):
+        sdict["k0"] = "changed"
+    assert sdict["k0"] == 0
+
+
+def test_collected(md_file):
+    """An unused StoredDict is collected, and its writer thread ends."""
+    sdict = StoredDict(md_file, delay=0.01)
+    sdict["a"] = 1
+    thread, key = sdict._sync_thread, sdict._sync_key
+    sdict.flush()
+    del sdict
+    gc.collect()
+    thread.join(timeout=1)
+    assert not thread.is_alive()
+    assert key not in _instances
+    assert load_config_yaml(md_file) == {"a": 1}
+
+
+def test_update(md_file):
+    """update() stores all entries (or none) with one sync."""
+    sdict = StoredDict(md_file, delay=0.2, title="unit testing")
+    sdict.update({"a": 1, "b": [1, 2.5, None]}, c={"d": True})
+    assert dict(sdict) == {"a": 1, "b": [1, 2.5, None], "c": {"d": True}}
+    assert sdict.sync_in_progress
+
+    with pytest.raises(TypeError):
+        sdict.update(e=1, f=object())
+    assert "e" not in sdict
+
+    sdict.flush()
+    assert load_config_yaml(md_file) == {"a": 1, "b": [1, 2.5, None], "c": {"d": True}}
+
+
+def test_journal(md_file):
+    """Journal mode appends changes, replays and compacts them."""
+    md_file.unlink()
+    journal = md_file.with_name(md_file.name + ".journal")
+    # Long delay: the test writes (as the writer thread would) with _write().
+    sdict = StoredDict(md_file, delay=60, journal=True, compact_every=5)
+    sdict.update(big="x" * 1000, scan_id=0)
+    sdict.flush()  # Compact: YAML file, no journal.
+    assert load_config_yaml(md_file) == {"big": "x" * 1000, "scan_id": 0}
+    assert not journal.exists()
+
+    sdict["scan_id"] = 1
+    sdict[2] = {3: "three"}
+    del sdict["big"]
+    sdict._write()
+    assert journal.exists()
+    assert len(journal.read_text()) < 200  # Only the changes.
+    assert "big" in load_config_yaml(md_file)  # Not compacted yet.
+
+    # Replay the journal, even if its last change is incomplete.
+    with open(journal, "a") as f:
+        f.write("--- {op: set, key: scan_id, val")
+    other = StoredDict(md_file, journal=True)
+    assert dict(other) == {"scan_id": 1, 2: {3: "three"}}
+    other.close()
+
+    for i in range(2):
+        sdict["scan_id"] = 10 + i
+        sdict._write()
+    assert not journal.exists()  # Compacted after 5 changes.
+    assert load_config_yaml(md_file) == {"scan_id": 11, 2: {3: "three"}}
+    sdict.close()
+
+
+def test_write_at_exit(tmp_path):
+    """Changes made just before the session exits are written."""
+    md_file = tmp_path / "md.yml"
+    code = (
+        "from instrument.utils.stored_dict import StoredDict;"
+        f"sd = StoredDict({str(md_file)!r}, delay=2);"
+        "sd['scan_id'] = 42"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+    assert load_config_yaml(md_file) == {"scan_id": 42}
+
+
+@pytest.mark.skipif(
+    "BENCHMARK" not in os.environ, reason="Benchmark: set BENCHMARK=1 to run."
+)
+def test_benchmark():
+    """Writes are no slower than the benchmark baseline (with tolerance)."""
+    from .bench_stored_dict import regressions
+    from .bench_stored_dict import run_benchmarks
+
+    assert regressions(run_benchmarks()) == []
@@ -0,0 +1,232 @@
+"""
+RunEngine callback timing
+=========================
+
+Time how long each RunEngine callback takes, for each type of document.
+
+Enable with ``RUN_ENGINE: {CALLBACK_TIMING: {ENABLE: true}}`` in
+``iconfig.yml``.  Then the callbacks subscribed to ``RE`` (and to the
+session's document router, instead of the router itself) are timed.
+Each (callback, document type) has a histogram of durations (bins of
+powers of two, from 1 microsecond).  A summary of the slowest callbacks is
+logged every ``LOG_INTERVAL`` seconds (while documents arrive).  In
+IPython, the ``%callback_timing`` magic shows the full report
+(``%callback_timing reset`` clears it).
+
+.. autosummary::
+    :nosignatures:
+
+    ~CallbackTimings
+    ~callback_name
+    ~register_timing_magic
+    ~time_subscriptions
+"""
+
+__all__ = [
+    "CallbackTimings",
+    "callback_name",
+    "register_timing_magic",
+    "time_subscriptions",
+]
+
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+
+from IPython import get_ipython
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+BIN_COUNT = 28  # Bin k: up to 2**k microseconds (the last bin: any longer).
+DEFAULT_LOG_INTERVAL = 60  # seconds
+LOG_SUMMARY_LENGTH = 5  # Callbacks in the periodic log line.
+REPORT_FIELDS = "callback document count mean_ms p50_ms p99_ms max_ms total_s".split()
+
+
+def callback_name(callback):
+    """Short name of a callback: function, method, or callable object."""
+    if inspect.ismethod(callback):
+        return f"{callback.__self__.__class__.__name__}.{callback.__name__}"
+    return getattr(callback, "__name__", None) or callback.__class__.__name__
+
+
+class _Histogram:
+    """Internal: durations of one callback for one type of document."""
+
+    def __init__(self):
+        self.bins = [0] * BIN_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        """Count one duration."""
+        microseconds = seconds * 1e6
+        k = 0 if microseconds <= 1 else math.ceil(math.log2(microseconds))
+        self.bins[min(k, BIN_COUNT - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper limit (seconds) of the bin with the 'q' quantile."""
+        target, cumulative = q * self.count, 0
+        for k, n in enumerate(self.bins):
+            cumulative += n
+            if n > 0 and cumulative >= target:
+                return min(2**k * 1e-6, self.max)
+        return self.max
+
+
+class CallbackTimings:
+    """
+    Histograms of the time each callback takes, by document type.
+
+    .. autosummary::
+
+        ~log_summary
+        ~record
+        ~report
+        ~reset
+        ~rows
+        ~wrap
+
+    PARAMETERS
+
+    log_interval : float
+        Seconds between log lines (``None`` or 0: no log lines).
+        Default: 60
+    """
+
+    def __init__(self, log_interval=DEFAULT_LOG_INTERVAL):
+        """No timings yet."""
+        self.log_interval = log_interval
+        self._histograms = {}  # {(callback name, document name): _Histogram}
+        self._lock = threading.Lock()
+        self._last_log = time.monotonic()
+
+    def __repr__(self):
+        """Representation of this object."""
+        return f"<{self.__class__.__name__} callbacks={len(self._histograms)}>"
+
+    def wrap(self, callback, name=None):
+        """Return 'callback', timed (as 'name')."""
+        name = name or callback_name(callback)
+
+        def timed(doc_name, doc):
+            t0 = time.perf_counter()
+            try:
+                return callback(doc_name, doc)
+            finally:
+                self.record(name, doc_name, time.perf_counter() - t0)
+
+        timed.__name__ = name
+        timed.__wrapped__ = callback
+        return timed
+
+    def record(self, name, doc_name, seconds):
+        """Add one duration for callback 'name' and document 'doc_name'."""
+        with self._lock:
+            histogram = self._histograms.get((name, doc_name))
+            if histogram is None:
+                histogram = self._histograms[(name, doc_name)] = _Histogram()
+            histogram.add(seconds)
+        if self.log_interval and time.monotonic() - self._last_log >= self.log_interval:
+            self.log_summary()
+
+    def reset(self):
+        """Forget all timings."""
+        with self._lock:
+            self._histograms = {}
+            self._last_log = time.monotonic()
+
+    def rows(self):
+        """One dict (REPORT_FIELDS) per callback & document, slowest first."""
+        with self._lock:
+            items = sorted(self._histograms.items(), key=lambda kv: -kv[1].total)
+            return [
+                dict(
+                    callback=name,
+                    document=doc_name,
+                    count=h.count,
+                    mean_ms=1e3 * h.total / h.count,
+                    p50_ms=1e3 * h.quantile(0.5),
+                    p99_ms=1e3 * h.quantile(0.99),
+                    max_ms=1e3 * h.max,
+                    total_s=h.total,
+                )
+                for (name, doc_name), h in items
+            ]
+
+    def report(self):
+        """Return the timings as a text table."""
+        fields = REPORT_FIELDS
+        rows = [fields]
+        for row in self.rows():
+            rows.append(
+                [
+                    row["callback"],
+                    row["document"],
+                    str(row["count"]),
+                    *[f"{row[key]:.3f}" for key in fields[3:]],
+                ]
+            )
+        widths = [max(len(row[i]) for row in rows) for i in range(len(fields))]
+        lines = [
+            "  ".join(
+                text.ljust(width) if i < 2 else text.rjust(width)
+                for i, (text, width) in enumerate(zip(row, widths, strict=True))
+            )
+            for row in rows
+        ]
+        return "\n".join(lines)
+
+    def log_summary(self):
+        """Log one line: the callbacks that took the most time."""
+        self._last_log = time.monotonic()
+        summary = [
+            f"{row['callback']}/{row['document']}"
+            f" n={row['count']} mean={row['mean_ms']:.2f}ms"
+            f" p99={row['p99_ms']:.2f}ms"
+            for row in self.rows()[:LOG_SUMMARY_LENGTH]
+        ]
+        if len(summary) > 0:
+            logger.info("Callback timing: %s", "; ".join(summary))
+
+
+def time_subscriptions(RE, timings, exclude=()):
+    """
+    Time each callback subscribed to 'RE' from now on.
+
+    Callbacks in 'exclude' are not timed, such as the session's document
+    router (its callbacks are timed, each document would count twice).
+    """
+    subscribe = RE.subscribe
+
+    @functools.wraps(subscribe)
+    def timed_subscribe(func, name="all"):
+        if any(func is other for other in exclude):
+            return subscribe(func, name)
+        return subscribe(timings.wrap(func), name)
+
+    RE.subscribe = timed_subscribe
+
+
+def register_timing_magic(timings):
+    """Add the ``%callback_timing`` magic (show or reset) to IPython."""
+    _ipython = get_ipython()
+    if _ipython is None:
+        return
+
+    def callback_timing(line):
+        """Show the RunEngine callback timings.  'reset' to clear them."""
+        if line.strip() == "reset":
+            timings.reset()
+        else:
+            print(timings.report())
+
+    _ipython.register_magic_function(callback_timing, "line", "callback_timing")
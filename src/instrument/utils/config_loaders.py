@@ -4,13 +4,20 @@ Load configuration files
 
 Load supported configuration files, such as ``iconfig.yml``.
 
+YAML files are parsed with the libyaml (C) loader, when available.  The
+parsed content is cached, until the file changes.
+
 .. autosummary::
     ~load_config_yaml
     ~IConfigFileVersionError
 """
 
 import logging
+import os
 import pathlib
+import threading
+import types
+from copy import deepcopy
 
 import yaml
 
@@ -19,28 +26,60 @@ logger.bsdev(__file__)
 instrument_path = pathlib.Path(__file__).parent.parent
 DEFAULT_ICONFIG_YML_FILE = instrument_path / "configs" / "iconfig.yml"
 ICONFIG_MINIMUM_VERSION = "2.0.0"
+YAML_LOADER = getattr(yaml, "CLoader", yaml.Loader)  # libyaml, if available
+
+_yaml_cache = {}  # {path: (file signature, parsed content)}
+_yaml_cache_lock = threading.Lock()
 
 
-def load_config_yaml(iconfig_yml=None) -> dict:
+def load_config_yaml(iconfig_yml=None, copy=True) -> dict:
     """
     Load iconfig.yml (and other YAML) configuration files.
 
+    The parsed content is cached, keyed by the file's path, modification
+    time, size, and inode.  A changed (or replaced) file is parsed again.
+
     Parameters
     ----------
     iconfig_yml: str
         Name of the YAML file to be loaded.  The name can be
         absolute or relative to the current working directory.
         Default: ``INSTRUMENT/configs/iconfig.yml``
+    copy: bool
+        If True (default), return a (deep) copy of the cached content,
+        which the caller may change.  If False, return the cached content,
+        which must not be changed.  Only its top level is a read-only
+        mapping: nested dictionaries and lists are the cached objects
+        themselves, shared with every other caller.
     """
 
     if iconfig_yml is None:
         path = DEFAULT_ICONFIG_YML_FILE
     else:
         path = pathlib.Path(iconfig_yml)
-    if not path.exists():
-        raise FileExistsError(f"Configuration file '{path}' does not exist.")
-    iconfig = yaml.load(open(path).read(), yaml.Loader)
-    return iconfig
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise FileExistsError(f"Configuration file '{path}' does not exist.") from None
+    signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    key = os.path.abspath(path)
+    with _yaml_cache_lock:
+        cached = _yaml_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        content = cached[1]
+    else:
+        with open(path, "rb") as f:
+            content = yaml.load(f, YAML_LOADER)
+        with _yaml_cache_lock:
+            _yaml_cache[key] = (signature, content)
+        logger.debug("Parsed '%s'.", path)
+
+    if copy:
+        return deepcopy(content)
+    if isinstance(content, dict):
+        return types.MappingProxyType(content)
+    return content
 
 
 class IConfigFileVersionError(ValueError):
@@ -8,9 +8,12 @@ EPICS & ophyd related setup
     ~set_timeouts
     ~epics_scan_id_source
     ~connect_scan_id_pv
+    ~wait_for_connections
 """
 
+import concurrent.futures
 import logging
+import time
 
 import ophyd
 from ophyd.signal import EpicsSignalBase
@@ -25,6 +28,7 @@ re_config = iconfig.get("RUN_ENGINE", {})
 
 DEFAULT_CONTROL_LAYER = "PyEpics"
 DEFAULT_TIMEOUT = 60  # default used next...
+DEFAULT_CONNECTION_WORKERS = 16
 ophyd_config = iconfig.get("OPHYD", {})
 
 
@@ -118,6 +122,70 @@ def set_timeouts():
         )
 
 
+def wait_for_connections(devices, timeout=None, max_workers=None) -> list:
+    """
+    Wait (in parallel) for all the devices to connect.
+
+    Returns as soon as all devices are connected or the deadline (``timeout``
+    seconds from now) has passed.  Returns the names of any devices that are
+    not connected by the deadline.
+
+    PARAMETERS
+
+    devices : list
+        Ophyd-style devices (objects without ``wait_for_connection()``
+        are ignored).
+    timeout : float
+        Time (s) to wait for all devices.
+        Default: ``OPHYD: TIMEOUTS: PV_CONNECTION`` in ``iconfig.yml``.
+    max_workers : int
+        Maximum number of devices to wait for at the same time.
+        Default: ``MAKE_DEVICES: CONNECTION_WORKERS`` in ``iconfig.yml`` (or 16).
+    """
+    devices = [obj for obj in devices if hasattr(obj, "wait_for_connection")]
+    if len(devices) == 0:
+        return []
+    if timeout is None:
+        timeouts = ophyd_config.get("TIMEOUTS", {})
+        timeout = timeouts.get("PV_CONNECTION", DEFAULT_TIMEOUT)
+    if max_workers is None:
+        max_workers = iconfig.get("MAKE_DEVICES", {}).get(
+            "CONNECTION_WORKERS", DEFAULT_CONNECTION_WORKERS
+        )
+
+    t0 = time.time()
+    deadline = t0 + timeout  # Same deadline for every device.
+
+    def waiter(obj):
+        obj.wait_for_connection(timeout=max(0, deadline - time.time()))
+
+    late = []
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, max_workers),
+        thread_name_prefix="wait_for_connection",
+    ) as executor:
+        futures = {executor.submit(waiter, obj): obj for obj in devices}
+        for future in concurrent.futures.as_completed(futures):
+            obj = futures[future]
+            try:
+                future.result()
+            except TimeoutError:
+                late.append(obj.name)
+            except Exception as reason:
+                logger.warning("Device %r connection error: %s", obj.name, reason)
+                late.append(obj.name)
+
+    logger.debug(
+        "%d of %d devices connected in %.3f s.",
+        len(devices) - len(late),
+        len(devices),
+        time.time() - t0,
+    )
+    if len(late) > 0:
+        logger.warning("Not connected after %s s: %s", timeout, ", ".join(sorted(late)))
+    return late
+
+
 oregistry = Registry(auto_register=True)
 """Registry of all ophyd-style Devices and Signals."""
 
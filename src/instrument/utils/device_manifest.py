@@ -0,0 +1,122 @@
+"""
+Compiled device manifests
+=========================
+
+Cache the parsed content of a device YAML file (such as ``devices.yml``),
+keyed by a hash of the file's content.
+
+A *manifest* is a dictionary with the device ``entries`` (as parsed from the
+YAML file) and the resolved ``imports`` (the import path of each class or
+factory named in the file).  Manifests are kept in memory (for
+``RE(make_devices())`` reloads) and, optionally, in a pickle file (for new
+sessions).  A manifest is replaced when its YAML file changes.
+
+To keep manifests on disk, set ``MAKE_DEVICES: MANIFEST_CACHE`` (a
+directory) in ``iconfig.yml``.  By default, manifests are kept only in
+memory.
+
+.. autosummary::
+    :nosignatures:
+
+    ~ManifestCache
+    ~file_digest
+"""
+
+import hashlib
+import logging
+import os
+import pathlib
+import pickle
+import tempfile
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+MANIFEST_FORMAT = 2
+
+
+def file_digest(file) -> str:
+    """Return a hash of the file's content."""
+    return hashlib.sha256(pathlib.Path(file).read_bytes()).hexdigest()
+
+
+class ManifestCache:
+    """
+    Manifests of device YAML files, in memory and (optionally) on disk.
+
+    .. autosummary::
+
+        ~get
+        ~put
+        ~cache_file
+
+    PARAMETERS
+
+    directory : str or pathlib.Path or None
+        Directory for the manifest (pickle) files.  If ``None``, do not
+        write manifests to disk.  Default: ``None``
+    """
+
+    def __init__(self, directory=None):
+        """Start with an empty (memory) cache."""
+        self.directory = None
+        if directory is not None:
+            self.directory = pathlib.Path(directory).expanduser()
+        self._memory = {}
+
+    def cache_file(self, config_file):
+        """Name of the pickle file for the manifest of 'config_file'."""
+        config_file = pathlib.Path(config_file).resolve()
+        key = hashlib.sha256(str(config_file).encode()).hexdigest()[:12]
+        return self.directory / f"{config_file.stem}_{key}.pickle"
+
+    def get(self, config_file, digest):
+        """Return the manifest matching 'digest' (or ``None``)."""
+        key = str(pathlib.Path(config_file).resolve())
+        manifest = self._memory.get(key)
+        if manifest is not None and manifest["digest"] == digest:
+            return manifest
+
+        if self.directory is None:
+            return None
+        path = self.cache_file(config_file)
+        try:
+            # Pickle (not JSON): keeps int keys, tuples, ... as parsed.
+            manifest = pickle.loads(path.read_bytes())
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            return None
+        if not isinstance(manifest, dict):
+            return None
+        if manifest.get("format") != MANIFEST_FORMAT:
+            return None
+        if manifest.get("digest") != digest:
+            logger.debug("Manifest for '%s' is stale.", config_file)
+            return None
+        self._memory[key] = manifest
+        logger.debug("Manifest for '%s' from '%s'.", config_file, path)
+        return manifest
+
+    def put(self, config_file, digest, entries, imports):
+        """Remember the manifest of 'config_file', return it."""
+        manifest = dict(
+            format=MANIFEST_FORMAT,
+            digest=digest,
+            source=str(config_file),
+            entries=entries,
+            imports=imports,
+        )
+        self._memory[str(pathlib.Path(config_file).resolve())] = manifest
+
+        if self.directory is not None:
+            path = self.cache_file(config_file)
+            try:
+                data = pickle.dumps(manifest, protocol=pickle.HIGHEST_PROTOCOL)
+                self.directory.mkdir(parents=True, exist_ok=True)
+                # Write to a temporary file, then rename (atomic).
+                fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except (OSError, pickle.PicklingError, TypeError) as reason:
+                logger.warning("Could not write manifest '%s': %s", path, reason)
+        return manifest
@@ -0,0 +1,144 @@
+"""
+Lazy catalog connection
+=======================
+
+Stand-in for a databroker catalog, connected in a background thread.
+
+Finding a databroker catalog (``databroker.catalog[name]``) reads and
+parses every intake catalog configuration.  A :class:`LazyCatalog` starts
+that work in a thread, so the session can continue (creating devices).
+The session waits only when the catalog is first used, such as when the
+RunEngine inserts its first document.
+
+.. caution:: A ``LazyCatalog`` is not an instance of the catalog class.
+
+    Code that needs ``isinstance()`` should use :meth:`LazyCatalog.get`
+    to obtain the real catalog.
+
+.. autosummary::
+    :nosignatures:
+
+    ~LazyCatalog
+"""
+
+__all__ = ["LazyCatalog"]
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+
+class LazyCatalog:
+    """
+    Proxy for a databroker catalog, connected in a background thread.
+
+    Any attribute access, ``cat[key]``, ``len(cat)``, or iteration waits
+    for the connection, then forwards to the catalog.
+
+    .. autosummary::
+
+        ~connected
+        ~get
+        ~insert
+        ~start
+
+    PARAMETERS
+
+    connect : callable
+        Called (in the thread) with no arguments, returns the catalog.
+    """
+
+    def __init__(self, connect):
+        """Only remember how to connect."""
+        object.__setattr__(self, "_lazy_connect", connect)
+        object.__setattr__(self, "_lazy_catalog", None)
+        object.__setattr__(self, "_lazy_error", None)
+        object.__setattr__(self, "_lazy_ready", threading.Event())
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+        object.__setattr__(self, "_lazy_thread", None)
+
+    @property
+    def connected(self):
+        """Is the catalog connected (without waiting)?"""
+        return self._lazy_ready.is_set() and self._lazy_error is None
+
+    def start(self):
+        """Start connecting, in a background thread."""
+        with self._lazy_lock:
+            if self._lazy_thread is not None:
+                return
+            thread = threading.Thread(
+                target=self._lazy_run, name="catalog_connect", daemon=True
+            )
+            object.__setattr__(self, "_lazy_thread", thread)
+        thread.start()
+
+    def _lazy_run(self):
+        """Internal: Connect (in the thread), then set ready."""
+        t0 = time.time()
+        catalog, error = None, None
+        try:
+            catalog = self._lazy_connect()
+        except Exception as reason:
+            error = reason
+            logger.error("Catalog not connected: %s", reason)
+        with self._lazy_lock:
+            object.__setattr__(self, "_lazy_catalog", catalog)
+            object.__setattr__(self, "_lazy_error", error)
+            self._lazy_ready.set()
+        logger.info("Catalog connected in %.3f s.", time.time() - t0)
+
+    def get(self, timeout=None):
+        """Wait for the connection (start it if needed), return the catalog."""
+        if not self._lazy_ready.is_set():
+            self.start()
+            t0 = time.time()
+            if not self._lazy_ready.wait(timeout):
+                raise TimeoutError(f"Catalog not connected in {timeout} s.")
+            logger.info("Waited %.3f s for the catalog.", time.time() - t0)
+        if self._lazy_error is not None:
+            raise self._lazy_error
+        return self._lazy_catalog
+
+    def insert(self, name, doc):
+        """RunEngine callback: ``catalog.v1.insert``, connected first."""
+        return self.get().v1.insert(name, doc)
+
+    def __getattr__(self, attr):
+        """Connect, then get the catalog's attribute."""
+        if attr.startswith("_lazy_"):
+            raise AttributeError(attr)
+        return getattr(self.get(), attr)
+
+    def __setattr__(self, attr, value):
+        """Connect, then set the catalog's attribute."""
+        setattr(self.get(), attr, value)
+
+    def __getitem__(self, key):
+        """Connect, then get a run from the catalog."""
+        return self.get()[key]
+
+    def __contains__(self, key):
+        """Connect, then look for a run in the catalog."""
+        return key in self.get()
+
+    def __iter__(self):
+        """Connect, then iterate over the catalog."""
+        return iter(self.get())
+
+    def __len__(self):
+        """Connect, then count the runs in the catalog."""
+        return len(self.get())
+
+    def __dir__(self):
+        """Connect, then list the catalog's attributes."""
+        return dir(self.get())
+
+    def __repr__(self):
+        """Representation of the catalog, or this proxy if not connected."""
+        if self.connected:
+            return repr(self._lazy_catalog)
+        return f"<{self.__class__.__name__} (not connected yet)>"
@@ -0,0 +1,130 @@
+"""
+Lazy device creation
+====================
+
+Stand-in objects for ophyd-style devices that are created (and connected)
+the first time they are used.
+
+Enable with ``MAKE_DEVICES: {LAZY: true}`` in ``iconfig.yml``.  Each device
+described in ``devices.yml`` by a class (not a factory function) is then
+registered (in ``oregistry`` and ``__main__``) as a :class:`LazyDevice`.
+
+.. caution:: A ``LazyDevice`` is not an instance of the device class.
+
+    Code that needs ``isinstance()`` should use :meth:`LazyDevice.build`
+    to obtain the real device.
+
+.. autosummary::
+    :nosignatures:
+
+    ~LazyDevice
+"""
+
+__all__ = ["LazyDevice"]
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+
+class LazyDevice:
+    """
+    Proxy for an ophyd-style device, created the first time it is used.
+
+    Any attribute access (other than ``name``) creates the device, waits for
+    it to connect, replaces this proxy in the registry (and namespace) with
+    the new device, then forwards the access to the device.
+
+    .. autosummary::
+
+        ~build
+        ~created
+
+    PARAMETERS
+
+    name : str
+        Name of the device (as given in the YAML file).
+    creator : callable
+        Called with no arguments to create the device.
+    labels : list
+        Ophyd labels of the device (as given in the YAML file).
+    registry : ophydregistry.Registry
+        Registry where this proxy is replaced by the device.
+    namespace : object
+        Namespace (such as ``__main__``) where this proxy is replaced
+        by the device.
+    """
+
+    parent = None  # A root device, as far as the registry is concerned.
+    _signals = {}  # Registry must not create the device to find components.
+
+    def __init__(self, name, creator, labels=None, registry=None, namespace=None):
+        """Only remember how to create the device."""
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_creator", creator)
+        object.__setattr__(self, "_lazy_labels", set(labels or []))
+        object.__setattr__(self, "_lazy_registry", registry)
+        object.__setattr__(self, "_lazy_namespace", namespace)
+        object.__setattr__(self, "_lazy_device", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    @property
+    def name(self):
+        """Name of the device."""
+        return self._lazy_name
+
+    @property
+    def _ophyd_labels_(self):
+        """Labels of the device, without creating it."""
+        return self._lazy_labels
+
+    @property
+    def created(self):
+        """Has the device been created?"""
+        return self._lazy_device is not None
+
+    def build(self):
+        """Create and connect the device (if not done already), return it."""
+        with self._lazy_lock:
+            if self._lazy_device is None:
+                t0 = time.time()
+                if self._lazy_registry is not None:
+                    self._lazy_registry.pop(self, None)
+                device = self._lazy_creator()
+                wait_for_connection = getattr(device, "wait_for_connection", None)
+                if wait_for_connection is not None:
+                    try:
+                        wait_for_connection()
+                    except TimeoutError as reason:
+                        logger.warning("Device %r not connected: %s", self.name, reason)
+                if self._lazy_registry is not None:
+                    self._lazy_registry.register(device)
+                namespace = self._lazy_namespace
+                if getattr(namespace, self.name, None) is self:
+                    setattr(namespace, self.name, device)
+                object.__setattr__(self, "_lazy_device", device)
+                logger.info("Device %r created in %.3f s.", self.name, time.time() - t0)
+        return self._lazy_device
+
+    def __getattr__(self, attr):
+        """Create the device, then get its attribute."""
+        if attr.startswith("_lazy_"):
+            raise AttributeError(attr)
+        return getattr(self.build(), attr)
+
+    def __setattr__(self, attr, value):
+        """Create the device, then set its attribute."""
+        setattr(self.build(), attr, value)
+
+    def __dir__(self):
+        """Create the device, then list its attributes."""
+        return dir(self.build())
+
+    def __repr__(self):
+        """Representation of the device, or this proxy if not yet created."""
+        if self.created:
+            return repr(self._lazy_device)
+        return f"<{self.__class__.__name__} {self.name!r} (not created yet)>"
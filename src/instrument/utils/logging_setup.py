@@ -98,7 +98,7 @@ def configure_logging():
     else:
         config_file = pathlib.Path(config_file)
 
-    logging_configuration = load_config_yaml(config_file)
+    logging_configuration = load_config_yaml(config_file, copy=False)
     for part, cfg in logging_configuration.items():
         logging.debug("%r - %s", part, cfg)
 
@@ -11,6 +11,8 @@ Construct ophyd-style devices from simple specifications in YAML files.
     ~Instrument
 """
 
+import copy
+import functools
 import logging
 import pathlib
 import sys
@@ -25,6 +27,11 @@ from .aps_functions import host_on_aps_subnet
 from .config_loaders import iconfig
 from .config_loaders import load_config_yaml
 from .controls_setup import oregistry  # noqa: F401
+from .controls_setup import wait_for_connections
+from .device_manifest import ManifestCache
+from .device_manifest import file_digest
+from .lazy_devices import LazyDevice
+from .startup_profiler import profiler
 
 logger = logging.getLogger(__name__)
 logger.bsdev(__file__)
@@ -34,9 +41,10 @@ configs_path = pathlib.Path(__file__).parent.parent / "configs"
 main_namespace = sys.modules["__main__"]
 local_control_devices_file = iconfig["DEVICES_FILE"]
 aps_control_devices_file = iconfig["APS_DEVICES_FILE"]
+make_devices_config = iconfig.get("MAKE_DEVICES", {})
 
 
-def make_devices(*, pause: float = 1):
+def make_devices(*, pause: float = 0, lazy: bool = None, timeout: float = None):
     """
     (plan stub) Create the ophyd-style controls for this instrument.
 
@@ -49,10 +57,23 @@ def make_devices(*, pause: float = 1):
     PARAMETERS
 
     pause : float
-        Wait 'pause' seconds (default: 1) for slow objects to connect.
+        Wait 'pause' seconds (default: 0) more, after the new devices have
+        connected (or their connection deadline has passed).
+    lazy : bool
+        If ``True``, create each device the first time it is used.
+        Default: ``MAKE_DEVICES: LAZY`` in ``iconfig.yml`` (or ``False``).
+    timeout : float
+        Deadline (s) for all new devices to connect, waiting for them in
+        parallel.  Devices not connected by then are reported in the log.
+        Default: ``OPHYD: TIMEOUTS: PV_CONNECTION`` in ``iconfig.yml``.
 
     """
     logger.debug("(Re)Loading local control objects.")
+    if lazy is None:
+        lazy = make_devices_config.get("LAZY", False)
+    _instr.lazy = lazy
+    n_known = len(_instr.unconnected_devices)
+
     yield from run_blocking_function(
         _loader, configs_path / local_control_devices_file, main=True
     )
@@ -62,6 +83,15 @@ def make_devices(*, pause: float = 1):
             _loader, configs_path / aps_control_devices_file, main=True
         )
 
+    # Wait for the new devices (in parallel).  A LazyDevice connects when used.
+    new_devices = [
+        obj
+        for obj in _instr.unconnected_devices[n_known:]
+        if not isinstance(obj, LazyDevice)
+    ]
+    del _instr.unconnected_devices[n_known:]  # Connections are handled here.
+    yield from run_blocking_function(wait_for_connections, new_devices, timeout)
+
     if pause > 0:
         logger.debug(
             "Waiting %s seconds for slow objects to connect.",
@@ -98,32 +128,76 @@ def _loader(yaml_device_file, main=True):
 class Instrument(guarneri.Instrument):
     """Custom YAML loader for guarneri."""
 
+    lazy = False
+    """If ``True``, create devices the first time they are used."""
+
+    def make_device(self, Klass, args, kwargs, fake):
+        """Create a device, or a LazyDevice to create it when first used."""
+        creator = functools.partial(super().make_device, Klass, args, kwargs, fake)
+        if self.lazy and isinstance(Klass, type) and "name" in kwargs:
+            # Factory functions may create several devices, always call them now.
+            return LazyDevice(
+                kwargs["name"],
+                creator,
+                labels=kwargs.get("labels"),
+                registry=self.devices,
+                namespace=main_namespace,
+            )
+        label = kwargs.get("name", getattr(Klass, "__name__", str(Klass)))
+        with profiler.phase(f"make_devices:{label}"):
+            return creator()
+
     def parse_yaml_file(self, config_file: pathlib.Path | str) -> list[dict]:
-        """Read device configurations from YAML format file."""
-        if isinstance(config_file, str):
-            config_file = pathlib.Path(config_file)
+        """
+        Read device configurations from YAML format file.
+
+        The parsed file is cached (as a manifest) until the file changes.
+        """
+        if hasattr(config_file, "read"):  # An open file.
+            config_file = config_file.name
+        config_file = pathlib.Path(config_file)
+
+        digest = file_digest(config_file)
+        manifest = _manifests.get(config_file, digest)
+        if manifest is not None:
+            try:
+                self._import_device_classes(manifest["imports"])
+            except (ImportError, AttributeError) as reason:
+                logger.debug("Manifest for '%s' is outdated: %s", config_file, reason)
+                manifest = None
+        if manifest is None:
+            manifest = self._compile_manifest(config_file, digest)
+
+        devices = copy.deepcopy(manifest["entries"])
+        for device in devices:
+            device["args"] = ()  # ALL specs are kwargs!
+        return devices
 
-        def parser(class_name, specs):
-            if class_name not in self.device_classes:
-                self.device_classes[class_name] = dynamic_import(class_name)
-            entries = [
-                {
-                    "device_class": class_name,
-                    "args": (),  # ALL specs are kwargs!
-                    "kwargs": table,
-                }
-                for table in specs
+    def _compile_manifest(self, config_file, digest):
+        """Parse the YAML file, import its classes, cache the manifest."""
+        entries, imports = [], {}
+        # each support type (class, factory, function, ...)
+        for class_name, specs in load_config_yaml(config_file, copy=False).items():
+            obj = self.device_classes.get(class_name) or dynamic_import(class_name)
+            imports[class_name] = class_name
+            resolved = f"{obj.__module__}.{getattr(obj, '__qualname__', '')}"
+            try:
+                if dynamic_import(resolved) is obj:
+                    imports[class_name] = resolved
+            except (ImportError, AttributeError, ValueError):
+                pass
+            self.device_classes[class_name] = obj
+            entries += [
+                {"device_class": class_name, "kwargs": table} for table in specs
             ]
-            return entries
-
-        devices = [
-            device
-            # parse the file
-            for k, v in load_config_yaml(config_file).items()
-            # each support type (class, factory, function, ...)
-            for device in parser(k, v)
-        ]
-        return devices
+        return _manifests.put(config_file, digest, entries, imports)
+
+    def _import_device_classes(self, imports):
+        """Import any classes (or factories) not known already."""
+        for class_name, import_path in imports.items():
+            if class_name not in self.device_classes:
+                self.device_classes[class_name] = dynamic_import(import_path)
 
 
+_manifests = ManifestCache(make_devices_config.get("MANIFEST_CACHE") or None)
 _instr = Instrument({}, registry=oregistry)  # singleton
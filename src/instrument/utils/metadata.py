@@ -2,32 +2,26 @@
 RunEngine Metadata
 ==================
 
+Versions are read from the installed package metadata, without importing
+the packages.
+
 .. autosummary::
     ~MD_PATH
+    ~VERSIONS
     ~get_md_path
+    ~get_versions
     ~re_metadata
 """
 
+import functools
 import getpass
+import importlib.metadata
 import logging
 import os
 import pathlib
 import socket
 import sys
 
-import apstools
-import bluesky
-import databroker
-import epics
-import h5py
-import intake
-import matplotlib
-import numpy
-import ophyd
-import pyRestTable
-import pysumreg
-import spec2nexus
-
 from .config_loaders import iconfig
 
 logger = logging.getLogger(__name__)
@@ -38,24 +32,49 @@ re_config = iconfig.get("RUN_ENGINE", {})
 DEFAULT_MD_PATH = pathlib.Path.home() / ".config" / "Bluesky_RunEngine_md"
 HOSTNAME = socket.gethostname() or "localhost"
 USERNAME = getpass.getuser() or "Bluesky user"
-VERSIONS = dict(
-    apstools=apstools.__version__,
-    bluesky=bluesky.__version__,
-    databroker=databroker.__version__,
-    epics=epics.__version__,
-    h5py=h5py.__version__,
-    intake=intake.__version__,
-    matplotlib=matplotlib.__version__,
-    numpy=numpy.__version__,
-    ophyd=ophyd.__version__,
-    pyRestTable=pyRestTable.__version__,
-    python=sys.version.split(" ")[0],
-    pysumreg=pysumreg.__version__,
-    spec2nexus=spec2nexus.__version__,
+DISTRIBUTIONS = dict(
+    # key in VERSIONS: name of the installed distribution
+    apstools="apstools",
+    bluesky="bluesky",
+    databroker="databroker",
+    epics="pyepics",
+    h5py="h5py",
+    intake="intake",
+    matplotlib="matplotlib",
+    numpy="numpy",
+    ophyd="ophyd",
+    pyRestTable="pyRestTable",
+    pysumreg="pysumreg",
+    spec2nexus="spec2nexus",
 )
 RE_CONFIG = iconfig.get("RUN_ENGINE", {})
 
 
+@functools.cache
+def get_versions():
+    """
+    Versions of Python and the packages (in DISTRIBUTIONS) used here.
+
+    Read from the installed package metadata (the packages are not imported).
+    Packages not installed are not reported.
+    """
+    versions = {}
+    for key, distribution in DISTRIBUTIONS.items():
+        try:
+            versions[key] = importlib.metadata.version(distribution)
+        except importlib.metadata.PackageNotFoundError:
+            logger.debug("Package %r not installed.", distribution)
+    versions["python"] = sys.version.split(" ")[0]
+    return dict(sorted(versions.items(), key=lambda kv: kv[0].lower()))
+
+
+def __getattr__(name):
+    """Compute VERSIONS only when first requested."""
+    if name == "VERSIONS":
+        return get_versions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_md_path():
     """
     Get path for RE metadata.
@@ -81,7 +100,7 @@ def re_metadata(cat=None):
     """Programmatic metadata for the RunEngine."""
     md = {
         "login_id": f"{USERNAME}@{HOSTNAME}",
-        "versions": VERSIONS,
+        "versions": dict(get_versions()),
         "pid": os.getpid(),
         "iconfig": iconfig,
     }
@@ -0,0 +1,202 @@
+"""
+Run plan stubs in dependency order
+==================================
+
+Run a set of plan stubs, each starting as soon as the stubs it depends on
+have finished.  Independent stubs run concurrently: their messages are
+interleaved (one at a time) within the same plan.
+
+The RunEngine waits for each ``wait_for``, ``wait``, or ``sleep`` message
+before it takes the next one, so interleaving alone does not overlap the
+time the stubs wait.  Instead, ``wait_for`` and ``wait`` messages are held
+until every running stub is waiting:
+
+* The ``wait_for`` messages (without keywords) are combined into one.  The
+  work each stub submitted (such as a blocking function running in a
+  thread) proceeds at the same time.
+* Then, each ``wait`` message is sent.  Everything the stubs started (such
+  as ``bps.mv()``) moves at the same time, so the waits take (about) as
+  long as the slowest.
+
+A ``sleep`` message (of any stub) still delays all of them.
+
+EXAMPLE::
+
+    steps = {
+        # plan stub: [plan stubs that must finish first]
+        setup_monochromator: [],
+        setup_diffractometers: [setup_monochromator],
+        setup_shutter: [],
+    }
+    RE(run_in_dependency_order(steps))
+
+.. caution:: A plan stub that calls ``bps.wait()`` *without* a group
+    will also wait for everything started by the other stubs.
+
+.. autosummary::
+    :nosignatures:
+
+    ~run_in_dependency_order
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+
+class _Task:
+    """Internal: a running plan stub."""
+
+    def __init__(self, step):
+        self.step = step
+        self.name = step.__name__
+        self.plan = step()
+        self.t0 = time.time()
+        self.response = None
+        self.exception = None
+
+    def advance(self):
+        """Return the next message from the plan stub."""
+        if self.exception is not None:
+            exception, self.exception = self.exception, None
+            return self.plan.throw(exception)
+        return self.plan.send(self.response)
+
+
+def _held(msg):
+    """Internal: Is 'msg' held until every running step waits?"""
+    command = getattr(msg, "command", None)
+    if command == "wait_for":
+        return len(msg.kwargs) == 0  # Can be combined.
+    return command == "wait"
+
+
+def _release(blocked):
+    """
+    Internal: (plan stub) Send the held messages of the 'blocked' tasks.
+
+    One ``wait_for`` for all the futures, then each ``wait``.
+    """
+    combined = [(task, msg) for task, msg in blocked if msg.command == "wait_for"]
+    if len(combined) > 0:
+        factories = [factory for _, msg in combined for factory in msg.args[0]]
+        try:
+            futures = yield combined[0][1]._replace(args=(factories,))
+        except Exception as exc:
+            for task, _ in combined:
+                task.exception = exc
+        else:
+            start = 0
+            for task, msg in combined:
+                end = start + len(msg.args[0])
+                task.response = None if futures is None else futures[start:end]
+                start = end
+
+    for task, msg in blocked:
+        if msg.command != "wait":
+            continue
+        try:
+            task.response = yield msg
+        except Exception as exc:
+            task.exception = exc
+
+
+def _check_steps(steps):
+    """Internal: Raise ValueError if dependencies are unknown or circular."""
+    for step, deps in steps.items():
+        for dep in deps:
+            if dep not in steps:
+                raise ValueError(
+                    f"Step {step.__name__!r} depends on unknown step {dep.__name__!r}."
+                )
+
+    resolved = set()
+    remaining = dict(steps)
+    while len(remaining) > 0:
+        ready = [step for step, deps in remaining.items() if set(deps) <= resolved]
+        if len(ready) == 0:
+            names = sorted(step.__name__ for step in remaining)
+            raise ValueError(f"Circular dependencies between steps: {names}")
+        for step in ready:
+            resolved.add(step)
+            remaining.pop(step)
+
+
+def run_in_dependency_order(steps, *, tolerate=(), concurrent=True):
+    """
+    (plan stub) Run plan stubs, each after the plan stubs it depends on.
+
+    The time taken by each step is logged.  Returns a dictionary with the
+    time (s) taken by each step that finished.
+
+    PARAMETERS
+
+    steps : dict
+        Maps each plan stub (called without arguments) to a list of plan
+        stubs that must finish before it starts.  Stubs that are ready at
+        the same time are started in the order given here.
+    tolerate : tuple
+        Exception types to log (as a warning) when raised by a step.  Steps
+        that depend on a failed step are skipped.  Other exceptions stop
+        all steps and are raised.
+    concurrent : bool
+        If ``False``, run one step at a time (still in dependency order).
+    """
+    _check_steps(steps)
+
+    durations = {}
+    finished, failed = set(), set()
+    waiting = list(steps)
+    running = []  # round-robin queue of _Task objects
+    blocked = []  # (_Task, held message)
+    try:
+        while len(waiting) > 0 or len(running) > 0 or len(blocked) > 0:
+            for step in list(waiting):
+                deps = steps[step]
+                if failed.intersection(deps):
+                    waiting.remove(step)
+                    failed.add(step)
+                    logger.warning("Skip %s(): a prerequisite failed.", step.__name__)
+                elif set(deps) <= finished and (concurrent or not (running or blocked)):
+                    waiting.remove(step)
+                    running.append(_Task(step))
+                    logger.debug("Starting %r.", step.__name__)
+
+            if len(running) == 0:
+                if len(blocked) > 0:
+                    # Every running step waits now.
+                    yield from _release(blocked)
+                    running.extend(task for task, _ in blocked)
+                    blocked.clear()
+                continue  # Or, steps were skipped: look again.
+            task = running.pop(0)
+            try:
+                msg = task.advance()
+            except StopIteration:
+                durations[task.name] = time.time() - task.t0
+                finished.add(task.step)
+                logger.info("%s() done in %.3f s.", task.name, durations[task.name])
+                continue
+            except tolerate as reason:
+                failed.add(task.step)
+                logger.warning("Problem during %s(): %s", task.name, reason)
+                continue
+
+            if _held(msg):
+                blocked.append((task, msg))
+                continue
+            try:
+                task.response = yield msg
+            except GeneratorExit:
+                task.plan.close()
+                raise
+            except Exception as exc:
+                task.exception = exc  # The RunEngine says this step failed.
+            running.append(task)
+    finally:
+        for task in running + [task for task, _ in blocked]:
+            task.plan.close()
+
+    return durations
@@ -0,0 +1,188 @@
+"""
+Supervised worker processes
+===========================
+
+Start processes (such as document consumers), restart any that exit, and
+stop them all when the session ends.
+
+A process that exits is restarted after a delay.  The delay doubles (up to
+``max_restart_delay``) each time the process exits soon after it was
+started, so a process that cannot start does not use all the CPU.  The
+output of each process is written to a log file (``<name>.log``).
+
+EXAMPLE::
+
+    supervisor = ProcessSupervisor(log_directory=".logs")
+    supervisor.add("proxy", ["bluesky-0MQ-proxy", "5567", "5568"])
+    supervisor.start()
+
+.. autosummary::
+    :nosignatures:
+
+    ~ProcessSupervisor
+"""
+
+__all__ = ["ProcessSupervisor"]
+
+import atexit
+import logging
+import pathlib
+import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+DEFAULT_LOG_DIRECTORY = ".logs"
+DEFAULT_RESTART_DELAY = 1  # seconds
+MAX_RESTART_DELAY = 60  # seconds
+POLL_INTERVAL = 0.5  # seconds
+
+
+class _Process:
+    """Internal: one supervised process."""
+
+    def __init__(self, name, command, log_file):
+        self.name = name
+        self.command = command
+        self.log_file = log_file
+        self.popen = None
+        self.started = 0  # time.monotonic() of the last start
+        self.restarts = 0
+        self.quick_exits = 0  # Exits soon after starting, in a row.
+        self.restart_at = None  # When to restart (after it exited).
+
+    def start(self):
+        """Start the process, its output appended to the log file."""
+        with open(self.log_file, "a") as log:
+            self.popen = subprocess.Popen(
+                self.command,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        self.started = time.monotonic()
+        self.restart_at = None
+        logger.info("Started %r (pid %d).", self.name, self.popen.pid)
+
+
+class ProcessSupervisor:
+    """
+    Start processes and keep them running.
+
+    .. autosummary::
+
+        ~add
+        ~start
+        ~status
+        ~stop
+
+    PARAMETERS
+
+    log_directory : str
+        Directory for the output of the processes.  Default: ``.logs``
+    restart_delay : float
+        Seconds to wait before restarting a process.  Default: 1
+    max_restart_delay : float
+        Longest wait before restarting a process.  Default: 60
+    """
+
+    def __init__(
+        self,
+        log_directory=DEFAULT_LOG_DIRECTORY,
+        restart_delay=DEFAULT_RESTART_DELAY,
+        max_restart_delay=MAX_RESTART_DELAY,
+    ):
+        """No processes yet."""
+        self.log_directory = pathlib.Path(log_directory)
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self._processes = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def __repr__(self):
+        """Representation of this object."""
+        return f"<{self.__class__.__name__} {list(self._processes)}>"
+
+    def add(self, name, command):
+        """Add (and start) a process: 'command' is a list of arguments."""
+        if name in self._processes:
+            raise KeyError(f"Process {name!r} already added.")
+        self.log_directory.mkdir(parents=True, exist_ok=True)
+        process = _Process(name, list(command), self.log_directory / f"{name}.log")
+        with self._lock:
+            self._processes[name] = process
+            process.start()
+
+    def start(self):
+        """Watch the processes (in a thread), stop them at exit."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._supervise, name="process_supervisor", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def status(self):
+        """Dictionary: for each process, its pid, exit code, and restarts."""
+        with self._lock:
+            return {
+                name: dict(
+                    pid=process.popen.pid,
+                    returncode=process.popen.poll(),
+                    restarts=process.restarts,
+                )
+                for name, process in self._processes.items()
+            }
+
+    def stop(self, timeout=5):
+        """Stop all the processes (terminate, then kill)."""
+        self._stopping.set()
+        with self._lock:
+            processes = list(self._processes.values())
+        for process in processes:
+            if process.popen.poll() is None:
+                process.popen.terminate()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            try:
+                process.popen.wait(timeout=max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning("Killing %r (pid %d).", process.name, process.popen.pid)
+                process.popen.kill()
+                process.popen.wait()
+
+    def _restart_delay(self, process):
+        """Internal: Longer delays while a process keeps exiting soon."""
+        if time.monotonic() - process.started < self.max_restart_delay:
+            process.quick_exits += 1
+        else:
+            process.quick_exits = 0
+        delay = self.restart_delay * 2 ** min(process.quick_exits, 10)
+        return min(delay, self.max_restart_delay)
+
+    def _supervise(self):
+        """Internal: restart any process that exits."""
+        while not self._stopping.wait(POLL_INTERVAL):
+            with self._lock:
+                for process in self._processes.values():
+                    returncode = process.popen.poll()
+                    if returncode is None:
+                        continue
+                    now = time.monotonic()
+                    if process.restart_at is None:
+                        delay = self._restart_delay(process)
+                        logger.warning(
+                            "Process %r exited (code %s), restart in %.1f s.",
+                            process.name,
+                            returncode,
+                            delay,
+                        )
+                        process.restart_at = now + delay
+                    elif now >= process.restart_at and not self._stopping.is_set():
+                        process.restarts += 1
+                        process.start()
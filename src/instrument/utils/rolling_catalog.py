@@ -0,0 +1,191 @@
+"""
+Size-bounded temporary catalog
+==============================
+
+``databroker.temp()`` writes each run to a msgpack file (one per run) in a
+temporary directory, and keeps all of them for the life of the session.
+A :class:`RollingCatalog` (a RunEngine callback) removes the oldest runs
+after each run ends, to keep at most ``max_runs`` runs and ``max_bytes``
+bytes.  With ``archive``, each removed run is first compressed (gzip) into
+that directory.
+
+Configure with ``TEMPORARY_CATALOG`` in ``iconfig.yml``.  Used only when
+the ``DATABROKER_CATALOG`` is not found.
+
+An archived run can be read again::
+
+    gunzip -k archive/*.msgpack.gz  # then, in Python:
+    from databroker._drivers.msgpack import BlueskyMsgpackCatalog
+    old = BlueskyMsgpackCatalog("archive/*.msgpack")
+
+.. note:: Only the msgpack files are counted, not files written by the
+    detectors (such as area detector HDF5 files).
+
+.. autosummary::
+    :nosignatures:
+
+    ~RollingCatalog
+"""
+
+__all__ = ["RollingCatalog"]
+
+import gzip
+import logging
+import pathlib
+import shutil
+import threading
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+SUFFIX = ".msgpack"
+
+
+class RollingCatalog:
+    """
+    Keep a temporary (msgpack) catalog within limits, oldest runs removed.
+
+    .. autosummary::
+
+        ~footprint
+        ~trim
+
+    PARAMETERS
+
+    catalog : BlueskyMsgpackCatalog
+        The catalog (such as ``databroker.temp().v2``).  May be set later,
+        until then, nothing is removed.  Default: ``None``
+    max_runs : int
+        Most runs to keep.  Default: no limit
+    max_bytes : int
+        Most bytes (of msgpack files) to keep.  Default: no limit
+    archive : str or pathlib.Path
+        Directory for the compressed runs.  Default: not archived
+    on_evict : callable
+        Called (once per :meth:`trim`, outside its lock) with the list of
+        the uids of the runs removed.  Default: ``None``
+    """
+
+    def __init__(
+        self,
+        catalog=None,
+        *,
+        max_runs=None,
+        max_bytes=None,
+        archive=None,
+        on_evict=None,
+    ):
+        """Nothing removed yet."""
+        self.catalog = catalog
+        self.max_runs = max_runs
+        self.max_bytes = max_bytes
+        self.archive = None if archive is None else pathlib.Path(archive)
+        self.on_evict = on_evict
+        self.evicted = 0  # Runs removed.
+        self.evicted_bytes = 0
+        self._open = set()  # uids of runs not yet ended.
+        self._lock = threading.Lock()
+
+    def __call__(self, name, doc):
+        """RunEngine callback: trim after each run ends."""
+        if name == "start":
+            self._open.add(doc["uid"])
+        elif name == "stop":
+            self._open.discard(doc["run_start"])
+            self.trim()
+
+    def __repr__(self):
+        """Representation of this object."""
+        usage = self.footprint()
+        return (
+            f"<{self.__class__.__name__}"
+            f" runs={usage['runs']} bytes={usage['bytes']}"
+            f" evicted={usage['evicted']}>"
+        )
+
+    @property
+    def directory(self):
+        """Directory of the msgpack files (``None`` if no catalog)."""
+        if self.catalog is None:
+            return None
+        path, *_ = self.catalog.paths
+        return pathlib.Path(path).parent
+
+    def _files(self):
+        """Internal: [(mtime, uid, path, bytes)] of the runs, oldest first."""
+        if self.directory is None or not self.directory.exists():
+            return []
+        files = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Removed meanwhile.
+            files.append((stat.st_mtime, path.name[: -len(SUFFIX)], path, stat.st_size))
+        return sorted(files)
+
+    def _over(self, runs, total):
+        """Internal: Are the limits exceeded?"""
+        if self.max_runs is not None and runs > self.max_runs:
+            return True
+        return self.max_bytes is not None and total > self.max_bytes
+
+    def _evict(self, uid, path, size):
+        """Internal: Archive (optional), remove the file and the catalog entry."""
+        if self.archive is not None:
+            self.archive.mkdir(parents=True, exist_ok=True)
+            target = self.archive / f"{path.name}.gz"
+            with open(path, "rb") as source, gzip.open(target, "wb") as sink:
+                shutil.copyfileobj(source, sink)
+        path.unlink()
+        # The catalog keeps its runs in memory (databroker internals).
+        getattr(self.catalog, "_uid_to_run_start_doc", {}).pop(uid, None)
+        getattr(self.catalog, "_entries", {}).pop(uid, None)
+        getattr(self.catalog, "_filename_to_mtime", {}).pop(str(path), None)
+        self.evicted += 1
+        self.evicted_bytes += size
+
+    def trim(self):
+        """Remove the oldest (ended) runs until within the limits."""
+        if self.catalog is None:
+            return 0
+        uids = []  # Of the runs removed.
+        with self._lock:
+            files = self._files()
+            runs, total = len(files), sum(size for *_, size in files)
+            for _mtime, uid, path, size in files:
+                if not self._over(runs, total):
+                    break
+                if uid in self._open:
+                    continue  # Still being written.
+                try:
+                    self._evict(uid, path, size)
+                except OSError as reason:
+                    logger.warning("Could not remove run %r: %s", uid, reason)
+                    break
+                uids.append(uid)
+                runs, total = runs - 1, total - size
+        if len(uids) > 0:
+            logger.info(
+                "Temporary catalog: removed %d run(s), keeping %d (%d bytes).",
+                len(uids),
+                runs,
+                total,
+            )
+            if self.on_evict is not None:
+                self.on_evict(uids)
+        return len(uids)
+
+    def footprint(self):
+        """Dictionary: runs and bytes kept, evicted, and archived."""
+        files = self._files()
+        archived = 0
+        if self.archive is not None and self.archive.exists():
+            archived = sum(p.stat().st_size for p in self.archive.glob("*.gz"))
+        return dict(
+            runs=len(files),
+            bytes=sum(size for *_, size in files),
+            evicted=self.evicted,
+            evicted_bytes=self.evicted_bytes,
+            archive_bytes=archived,
+        )
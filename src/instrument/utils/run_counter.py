@@ -0,0 +1,143 @@
+"""
+Cached count of the runs in a catalog
+=====================================
+
+``len(cat)`` counts the runs (the start documents) in the catalog.  For a
+MongoDB catalog, that is a query of the whole collection.  A
+:class:`RunCounter` keeps the count instead: the catalog insert callback
+(see :meth:`RunCounter.counted`) adds one for each ``start`` document.
+
+The count, and the uid of the last run counted, are saved (by catalog name)
+in a YAML file (``RUN_COUNTER_PATH`` in ``iconfig.yml``).  When a session
+starts, the saved count is used only if the catalog's most recent run
+(``cat[-1]``, one indexed query) is that last run.  Otherwise (runs added
+by another session or process, or deleted, or no saved count), the runs are
+counted with ``len(cat)``.
+
+EXAMPLE::
+
+    run_counter = RunCounter(cat, StoredDict(".catalog_runs.yml"))
+    RE.subscribe(run_counter.counted(cat.v1.insert))
+    len(run_counter)  # same as len(cat)
+
+.. autosummary::
+    :nosignatures:
+
+    ~RunCounter
+"""
+
+__all__ = ["RunCounter"]
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+
+class RunCounter:
+    """
+    Number of runs in a catalog, kept current by the insert callback.
+
+    .. autosummary::
+
+        ~count
+        ~counted
+        ~recount
+
+    PARAMETERS
+
+    catalog : databroker catalog
+        The (v2) catalog, such as ``cat``.
+    storage : dict
+        Where to save ``{catalog name: {"count": n, "last_uid": uid}}``,
+        such as a :class:`~instrument.utils.stored_dict.StoredDict`.
+        Default: ``{}`` (not saved)
+    """
+
+    def __init__(self, catalog, storage=None):
+        """The count is checked (or counted) when first needed."""
+        self.catalog = catalog
+        self.storage = {} if storage is None else storage
+        self._count = None  # Not yet known.
+        self._last_uid = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of runs in the catalog."""
+        return self.count
+
+    def __repr__(self):
+        """Representation of this object."""
+        return f"<{self.__class__.__name__} count={self._count}>"
+
+    @property
+    def count(self):
+        """Number of runs in the catalog."""
+        with self._lock:
+            if self._count is None:
+                self._load()
+            return self._count
+
+    @property
+    def _key(self):
+        """Internal: Name of the catalog in storage."""
+        return self.catalog.name
+
+    def _latest_uid(self):
+        """Internal: uid of the most recent run in the catalog (or None)."""
+        try:
+            return self.catalog[-1].metadata["start"]["uid"]
+        except (IndexError, KeyError):
+            return None  # No runs.
+
+    def _load(self):
+        """Internal: Use the saved count if it is current, or count."""
+        saved = self.storage.get(self._key) or {}
+        latest = self._latest_uid()
+        if "count" in saved and saved.get("last_uid") == latest:
+            self._count, self._last_uid = saved["count"], latest
+            logger.debug("Catalog %r: %d runs (saved).", self._key, self._count)
+        else:
+            self._count, self._last_uid = len(self.catalog), latest
+            logger.info("Catalog %r: %d runs (counted).", self._key, self._count)
+            self._save()
+
+    def _save(self):
+        """Internal: Save the count (as a new value, written by StoredDict)."""
+        self.storage[self._key] = dict(count=self._count, last_uid=self._last_uid)
+
+    def recount(self):
+        """Count the runs in the catalog (``len(catalog)``), save it."""
+        with self._lock:
+            self._count = len(self.catalog)
+            self._last_uid = self._latest_uid()
+            self._save()
+            return self._count
+
+    def counted(self, insert):
+        """
+        Return 'insert' (a ``(name, doc)`` callback), counting new runs.
+
+        A run is counted once its ``start`` document has been inserted.
+        """
+
+        def counted_insert(name, doc):
+            if name != "start":
+                return insert(name, doc)
+            with self._lock:
+                if self._count is None:
+                    # Before the insert: a catalog may not list the new run
+                    # at once (such as a msgpack catalog, until written).
+                    self._load()
+            result = insert(name, doc)
+            with self._lock:
+                if doc["uid"] != self._last_uid:
+                    self._count += 1
+                    self._last_uid = doc["uid"]
+                    self._save()
+            return result
+
+        counted_insert.__name__ = getattr(insert, "__name__", "insert")
+        counted_insert.__wrapped__ = insert
+        return counted_insert
@@ -0,0 +1,312 @@
+"""
+Index of run summaries
+======================
+
+A compact SQLite index of the runs in a catalog, to find runs (by
+``scan_id``, plan, title, detector, motor, or time) without a query of the
+catalog's start documents.  Only the runs found are fetched from the
+catalog.
+
+One row per run: ``uid``, ``scan_id``, ``plan_name``, ``title``, ``time``
+(of the start document), ``exit_status``, ``detectors``, ``motors``, and
+``num_points`` (events in the ``primary`` stream, or as planned).
+
+The index is kept current by a RunEngine subscription (see
+``RUN_INDEX_PATH`` in ``iconfig.yml``).  Runs added some other way are
+found by :meth:`RunIndex.backfill`, which reads only the runs not yet in
+the index.  Several sessions (and notebooks) can use the same index file.
+
+EXAMPLE::
+
+    run_index = RunIndex(".run_index.db", cat)
+    run_index.backfill()  # Once, for the runs already in the catalog.
+    run_index.search(plan_name="rel_scan", since="2024-06-01")
+    run = run_index.run(scan_id=105)  # The BlueskyRun from the catalog.
+
+.. autosummary::
+    :nosignatures:
+
+    ~RunIndex
+"""
+
+__all__ = ["RunIndex"]
+
+import datetime
+import json
+import logging
+import pathlib
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+COLUMNS = """
+    uid scan_id plan_name title time exit_status detectors motors num_points
+""".split()
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    uid TEXT PRIMARY KEY,
+    catalog TEXT,
+    scan_id INTEGER,
+    plan_name TEXT,
+    title TEXT,
+    time REAL,
+    exit_status TEXT,
+    detectors TEXT,
+    motors TEXT,
+    num_points INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_time ON runs (catalog, time);
+CREATE INDEX IF NOT EXISTS runs_scan_id ON runs (catalog, scan_id);
+"""
+
+
+def _timestamp(value):
+    """Internal: Seconds since the epoch, from a number or ISO 8601 text."""
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value).timestamp()
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _summary(start, stop=None):
+    """Internal: Row (dict of COLUMNS) summarizing one run."""
+    num_points = start.get("num_points")
+    exit_status = None
+    if stop is not None:
+        exit_status = stop.get("exit_status")
+        num_points = (stop.get("num_events") or {}).get("primary", num_points)
+    return dict(
+        uid=start["uid"],
+        scan_id=start.get("scan_id"),
+        plan_name=start.get("plan_name"),
+        title=start.get("title"),
+        time=start.get("time"),
+        exit_status=exit_status,
+        detectors=json.dumps(list(start.get("detectors", []))),
+        motors=json.dumps(list(start.get("motors", []))),
+        num_points=num_points,
+    )
+
+
+class RunIndex:
+    """
+    SQLite index of the runs in a catalog.
+
+    .. autosummary::
+
+        ~backfill
+        ~clear
+        ~close
+        ~remove
+        ~run
+        ~runs
+        ~search
+
+    PARAMETERS
+
+    path : str or pathlib.Path
+        The SQLite file.  Default: ``":memory:"`` (not saved)
+    catalog : databroker catalog
+        The (v2) catalog, such as ``cat``.  Needed to fetch runs and to
+        backfill.  Default: ``None``
+    """
+
+    def __init__(self, path=":memory:", catalog=None):
+        """Open (or create) the index."""
+        self.path = path
+        self.catalog = catalog
+        if path != ":memory:":
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # RunEngine callbacks and lookups may come from different threads.
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript(SCHEMA)
+
+    def __call__(self, name, doc):
+        """RunEngine callback: index each run at start, update at stop."""
+        if name == "start":
+            self._put([_summary(doc)])
+        elif name == "stop":
+            with self._lock, self._db:
+                self._db.execute(
+                    "UPDATE runs SET exit_status = ?,"
+                    " num_points = COALESCE(?, num_points) WHERE uid = ?",
+                    (
+                        doc.get("exit_status"),
+                        (doc.get("num_events") or {}).get("primary"),
+                        doc["run_start"],
+                    ),
+                )
+
+    def __len__(self):
+        """Number of runs in the index (of this catalog)."""
+        with self._lock:
+            (count,) = self._db.execute(
+                "SELECT COUNT(*) FROM runs WHERE catalog IS ?", (self.catalog_name,)
+            ).fetchone()
+        return count
+
+    def __repr__(self):
+        """Representation of this object."""
+        return f"<{self.__class__.__name__} {str(self.path)!r}>"
+
+    @property
+    def catalog_name(self):
+        """Name of the catalog (its runs in the index)."""
+        return getattr(self.catalog, "name", None)
+
+    def _put(self, summaries):
+        """Internal: Add (or replace) rows."""
+        placeholders = ", ".join(["?"] * (len(COLUMNS) + 1))
+        rows = [
+            [self.catalog_name] + [summary[key] for key in COLUMNS]
+            for summary in summaries
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO runs (catalog, {', '.join(COLUMNS)})"
+                f" VALUES ({placeholders})",
+                rows,
+            )
+
+    def backfill(self, batch_size=100):
+        """
+        Add the catalog's runs that are not in the index.  Return how many.
+
+        Only the uids of the catalog are listed, then each missing run is
+        read (its start and stop documents).
+        """
+        if self.catalog is None:
+            raise ValueError("No catalog to backfill from.")
+        with self._lock:
+            known = {
+                uid
+                for (uid,) in self._db.execute(
+                    "SELECT uid FROM runs WHERE catalog IS ?", (self.catalog_name,)
+                )
+            }
+        added, summaries = 0, []
+        for uid in list(self.catalog):
+            if uid in known:
+                continue
+            metadata = self.catalog[uid].metadata
+            summaries.append(_summary(metadata["start"], metadata.get("stop")))
+            if len(summaries) >= batch_size:
+                self._put(summaries)
+                added, summaries = added + len(summaries), []
+        self._put(summaries)
+        added += len(summaries)
+        logger.info("Run index: added %d runs from %r.", added, self.catalog_name)
+        return added
+
+    def clear(self, catalog_name=None):
+        """Forget the runs of a catalog.  Default: this catalog."""
+        if catalog_name is None:
+            catalog_name = self.catalog_name
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM runs WHERE catalog IS ?", (catalog_name,))
+
+    def close(self):
+        """Close the SQLite file."""
+        with self._lock:
+            self._db.close()
+
+    def remove(self, uids):
+        """Forget these runs (such as runs removed from the catalog)."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "DELETE FROM runs WHERE catalog IS ? AND uid = ?",
+                [(self.catalog_name, uid) for uid in uids],
+            )
+
+    def search(
+        self,
+        *,
+        scan_id=None,
+        plan_name=None,
+        title=None,
+        detector=None,
+        motor=None,
+        exit_status=None,
+        since=None,
+        until=None,
+        limit=None,
+    ):
+        """
+        Summaries (dicts) of the matching runs, most recent first.
+
+        PARAMETERS
+
+        scan_id : int
+            The run's ``scan_id``.
+        plan_name : str
+            The plan, such as ``"rel_scan"``.
+        title : str
+            Part of the run's ``title`` (case insensitive).
+        detector, motor : str
+            Name of one of the run's detectors (or motors).
+        exit_status : str
+            Such as ``"success"`` or ``"abort"``.
+        since, until : float or str
+            Time range (seconds since the epoch, or ISO 8601 text) of the
+            run's start.
+        limit : int
+            Return no more runs.  Default: all matches
+        """
+        terms, values = ["catalog IS ?"], [self.catalog_name]
+        for column, value in dict(
+            scan_id=scan_id, plan_name=plan_name, exit_status=exit_status
+        ).items():
+            if value is not None:
+                terms.append(f"{column} = ?")
+                values.append(value)
+        if title is not None:
+            terms.append("title LIKE ?")
+            values.append(f"%{title}%")
+        for column, value in dict(detectors=detector, motors=motor).items():
+            if value is not None:
+                terms.append(f"{column} LIKE ?")
+                values.append(f"%{json.dumps(value)}%")
+        if since is not None:
+            terms.append("time >= ?")
+            values.append(_timestamp(since))
+        if until is not None:
+            terms.append("time < ?")
+            values.append(_timestamp(until))
+        sql = (
+            f"SELECT {', '.join(COLUMNS)} FROM runs"
+            f" WHERE {' AND '.join(terms)} ORDER BY time DESC"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            values.append(int(limit))
+        with self._lock:
+            rows = self._db.execute(sql, values).fetchall()
+        results = []
+        for row in rows:
+            summary = dict(row)
+            summary["detectors"] = json.loads(summary["detectors"] or "[]")
+            summary["motors"] = json.loads(summary["motors"] or "[]")
+            results.append(summary)
+        return results
+
+    def runs(self, **kwargs):
+        """Fetch the matching runs from the catalog (see :meth:`search`)."""
+        for summary in self.search(**kwargs):
+            yield self.catalog[summary["uid"]]
+
+    def run(self, **kwargs):
+        """
+        Fetch the most recent matching run from the catalog.
+
+        Raises KeyError if no run matches (see :meth:`search`).
+        """
+        found = self.search(limit=1, **kwargs)
+        if len(found) == 0:
+            raise KeyError(f"No run matches {kwargs}.")
+        return self.catalog[found[0]["uid"]]
@@ -0,0 +1,202 @@
+"""
+Index of the scans in a SPEC data file
+======================================
+
+Byte offsets of the scans (``#S`` lines) and file headers (``#F`` lines) in
+a SPEC data file, kept in a sidecar JSON file (the data file name plus
+``.index``).
+
+The index is updated incrementally: only the part of the data file written
+since the last update is searched.  The index is rebuilt if it is missing,
+or if the data file was replaced or truncated.  With the index, finding the
+last scan number (to append to a file) or reading one scan does not depend
+on the size of the data file.
+
+.. autosummary::
+    :nosignatures:
+
+    ~SpecScanIndex
+"""
+
+__all__ = ["SpecScanIndex"]
+
+import json
+import logging
+import mmap
+import os
+import pathlib
+import tempfile
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+INDEX_FORMAT = 1
+INDEX_SUFFIX = ".index"
+
+
+def _lines_starting_with(buf, tag, start, end):
+    """Internal: Offsets of the lines (in buf[start:end]) starting with 'tag'."""
+    offsets = []
+    if buf[start : start + len(tag)] == tag:
+        offsets.append(start)
+    position = buf.find(b"\n" + tag, start, end)
+    while position >= 0:
+        offsets.append(position + 1)
+        position = buf.find(b"\n" + tag, position + 1, end)
+    return offsets
+
+
+class SpecScanIndex:
+    """
+    Scan number to byte offset index of a SPEC data file.
+
+    .. autosummary::
+
+        ~highest_scan_number
+        ~read_scan
+        ~scan_numbers
+        ~update
+
+    PARAMETERS
+
+    data_file : str or pathlib.Path
+        Name of the SPEC data file.
+    """
+
+    def __init__(self, data_file):
+        """Nothing is read until needed."""
+        self.data_file = pathlib.Path(data_file)
+        self.index_file = self.data_file.with_name(self.data_file.name + INDEX_SUFFIX)
+        self._state = None  # Index content, once read (or built).
+
+    def __repr__(self):
+        """Representation of this object."""
+        return f"<{self.__class__.__name__} {str(self.data_file)!r}>"
+
+    def _empty(self, stat):
+        """Internal: index of nothing (yet) in the data file."""
+        return dict(
+            format=INDEX_FORMAT,
+            inode=stat.st_ino,
+            size=0,  # Bytes of the data file that have been indexed.
+            scans=[],  # [scan number (str), offset]
+            headers=[],  # offsets of '#F' lines
+        )
+
+    def _read_index(self, stat):
+        """Internal: Read the index file, ``None`` if not usable."""
+        try:
+            state = json.loads(self.index_file.read_text())
+        except (OSError, ValueError):
+            return None
+        if state.get("format") != INDEX_FORMAT or state.get("inode") != stat.st_ino:
+            return None
+        return state
+
+    def _is_stale(self, state, stat):
+        """Internal: Has the data file changed other than by appending?"""
+        if state["inode"] != stat.st_ino or state["size"] > stat.st_size:
+            return True
+        if len(state["scans"]) == 0:
+            return False
+        offset = state["scans"][-1][1]
+        with open(self.data_file, "rb") as f:
+            f.seek(offset)
+            return f.read(3) != b"#S "
+
+    def _search(self, state, stat):
+        """Internal: Add scans (and headers) written after the indexed part."""
+        start, end = state["size"], stat.st_size
+        if end <= start:
+            return False
+        with open(self.data_file, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                end = buf.rfind(b"\n", start, end) + 1  # Only complete lines.
+                if end <= start:
+                    return False
+                headers = _lines_starting_with(buf, b"#F ", start, end)
+                scans = []
+                for offset in _lines_starting_with(buf, b"#S ", start, end):
+                    words = buf[offset : buf.find(b"\n", offset, end)].split()
+                    if len(words) > 1:
+                        scans.append([words[1].decode(errors="replace"), offset])
+        state["scans"] += scans
+        state["headers"] += headers
+        state["size"] = end
+        return len(scans) + len(headers) > 0
+
+    def _write_index(self, state):
+        """Internal: Write the index file (atomic)."""
+        try:
+            fd, tmp = tempfile.mkstemp(
+                dir=self.index_file.parent, prefix=f".{self.index_file.name}."
+            )
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.index_file)
+        except OSError as reason:
+            logger.warning("Could not write '%s': %s", self.index_file, reason)
+
+    def update(self):
+        """Bring the index up to date with the data file, return it."""
+        try:
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            self._state = None
+            return None
+
+        state = self._state
+        if state is None:
+            state = self._read_index(stat)
+        if state is None or self._is_stale(state, stat):
+            logger.debug("Building scan index for '%s'.", self.data_file)
+            state = self._empty(stat)
+            changed = True
+        else:
+            changed = False
+        changed = self._search(state, stat) or changed
+        if changed:
+            self._write_index(state)
+        self._state = state
+        return state
+
+    def scan_numbers(self):
+        """List of the scan numbers (str) in the data file."""
+        state = self.update()
+        if state is None:
+            return []
+        return [number for number, _offset in state["scans"]]
+
+    def highest_scan_number(self):
+        """
+        Highest scan number in the data file (0 if no scans).
+
+        As ``apstools`` would report, but without reading the whole file.
+        """
+        numbers = self.scan_numbers()
+        highest = 0
+        for number in numbers:
+            try:
+                highest = max(highest, float(number))
+            except ValueError:
+                pass
+        return int(max(len(numbers), highest) + 0.9999)
+
+    def read_scan(self, scan_number):
+        """
+        Return the text of one scan (the last one with 'scan_number').
+
+        Raises KeyError if the scan is not in the data file.
+        """
+        state = self.update()
+        scans = [] if state is None else state["scans"]
+        offsets = [offset for number, offset in scans if number == str(scan_number)]
+        if len(offsets) == 0:
+            raise KeyError(f"Scan {scan_number} not in '{self.data_file}'.")
+        start = offsets[-1]
+        later = [offset for _n, offset in scans if offset > start]
+        later += [offset for offset in state["headers"] if offset > start]
+        end = min(later, default=state["size"])
+        with open(self.data_file, "rb") as f:
+            f.seek(start)
+            return f.read(end - start).decode()
@@ -0,0 +1,190 @@
+"""
+Startup phase profiler
+======================
+
+Time each phase of ``instrument.startup`` and write a report.
+
+Enable with ``STARTUP_PROFILE: {ENABLE: true}`` in ``iconfig.yml``.  The
+report is written (as JSON and CSV files) to the ``REPORT_DIRECTORY``
+(default: ``.logs``) when startup finishes.  Compare two reports from the
+command line (or use ``instrument-startup-diff``)::
+
+    python -m instrument.utils.startup_profiler OLD.json NEW.json
+
+.. autosummary::
+    :nosignatures:
+
+    ~profiler
+    ~StartupProfiler
+    ~compare_reports
+    ~timed_plan
+    ~main
+"""
+
+import argparse
+import contextlib
+import csv
+import datetime
+import json
+import logging
+import pathlib
+import time
+
+from .config_loaders import iconfig
+
+logger = logging.getLogger(__name__)
+logger.bsdev(__file__)
+
+profile_config = iconfig.get("STARTUP_PROFILE", {})
+
+DEFAULT_REPORT_DIRECTORY = ".logs"
+DEFAULT_REPORT_FILE_BASE = "startup_profile"
+REPORT_FIELDS = "phase depth start duration".split()
+
+
+class StartupProfiler:
+    """
+    Record the time spent in each (named) phase of the startup.
+
+    Phases may be nested.  The ``depth`` of each phase is recorded so that
+    nested phases are not counted twice.
+
+    .. autosummary::
+
+        ~phase
+        ~record
+        ~report
+        ~write_report
+    """
+
+    def __init__(self, enabled=False):
+        """Start the clock."""
+        self.enabled = enabled
+        self.phases = []
+        self._depth = 0
+        self._t0 = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """(context manager) Time the named phase."""
+        if not self.enabled:
+            yield
+            return
+        entry = dict(phase=name, depth=self._depth, start=0.0, duration=0.0)
+        self.phases.append(entry)  # Keep the phases in order of starting.
+        self._depth += 1
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            entry["start"] = round(t0 - self._t0, 6)
+            entry["duration"] = round(time.perf_counter() - t0, 6)
+            logger.debug("Startup phase %r: %.3f s", name, entry["duration"])
+
+    def record(self, name, duration):
+        """Record a phase (just finished) that was timed elsewhere."""
+        if self.enabled:
+            start = time.perf_counter() - self._t0 - duration
+            self.phases.append(
+                dict(
+                    phase=name,
+                    depth=self._depth,
+                    start=round(start, 6),
+                    duration=round(duration, 6),
+                )
+            )
+
+    def report(self):
+        """Return the report as a dictionary."""
+        return dict(
+            created=str(datetime.datetime.now()),
+            total=round(time.perf_counter() - self._t0, 6),
+            phases=self.phases,
+        )
+
+    def write_report(self, directory=None, file_base=None):
+        """Write the report to JSON & CSV files, return the JSON file path."""
+        directory = pathlib.Path(
+            directory
+            or profile_config.get("REPORT_DIRECTORY", DEFAULT_REPORT_DIRECTORY)
+        )
+        file_base = file_base or profile_config.get(
+            "REPORT_FILE_BASE", DEFAULT_REPORT_FILE_BASE
+        )
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        json_file = directory / f"{file_base}_{stamp}.json"
+        csv_file = json_file.with_suffix(".csv")
+
+        report = self.report()
+        with open(json_file, "w") as f:
+            json.dump(report, f, indent=2)
+        with open(csv_file, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(report["phases"])
+
+        logger.info("Startup profile (%.3f s): %s", report["total"], json_file)
+        return json_file
+
+
+def timed_plan(name, plan):
+    """(plan stub) Time a plan (or plan stub) as a startup phase."""
+    with profiler.phase(name):
+        return (yield from plan)
+
+
+def compare_reports(old, new):
+    """
+    Compare two startup profile reports (dictionaries).
+
+    Returns a list of ``(phase, old_duration, new_duration, change)`` tuples,
+    in the order phases appear in the *new* report.  A duration is ``None``
+    if the phase is not in that report.
+    """
+
+    def durations(report):
+        result = {}
+        for entry in report["phases"]:
+            # Sum the durations of a repeated phase.
+            key = entry["phase"]
+            result[key] = result.get(key, 0) + entry["duration"]
+        return result
+
+    t_old, t_new = durations(old), durations(new)
+    names = list(t_new) + [k for k in t_old if k not in t_new]
+    rows = []
+    for name in names:
+        a, b = t_old.get(name), t_new.get(name)
+        change = None if None in (a, b) else b - a
+        rows.append((name, a, b, change))
+    rows.append(("(total)", old["total"], new["total"], new["total"] - old["total"]))
+    return rows
+
+
+def main(argv=None):
+    """Command-line tool: compare two startup profile reports."""
+    parser = argparse.ArgumentParser(description="Compare two startup profiles.")
+    parser.add_argument("old", help="JSON report file (reference)")
+    parser.add_argument("new", help="JSON report file (compared to reference)")
+    args = parser.parse_args(argv)
+
+    reports = [json.loads(pathlib.Path(f).read_text()) for f in (args.old, args.new)]
+
+    def fmt(value, sign=""):
+        return "-" if value is None else f"{value:{sign}.3f}"
+
+    rows = [("phase", "old (s)", "new (s)", "change (s)")]
+    for name, a, b, change in compare_reports(*reports):
+        rows.append((name, fmt(a), fmt(b), fmt(change, "+")))
+    widths = [max(len(row[i]) for row in rows) for i in range(4)]
+    for row in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths, strict=True)))
+
+
+profiler = StartupProfiler(enabled=profile_config.get("ENABLE", False))
+"""Startup profiler for this session."""
+
+if __name__ == "__main__":
+    main()
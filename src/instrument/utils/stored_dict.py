@@ -9,6 +9,8 @@ Replaces ``bluesky.utils.PersistentDict``.
 * Contents must be JSON serializable.
 * Contents stored in a single human-readable YAML file.
 * Sync to disk shortly after dictionary is updated.
+* One writer thread per dictionary, file replaced atomically.
+* Optional journal: append each change, compact into the YAML file later.
 
 .. autosummary::
 
@@ -17,20 +19,88 @@ Replaces ``bluesky.utils.PersistentDict``.
 
 __all__ = ["StoredDict"]
 
+import atexit
 import collections.abc
 import datetime
-import inspect
 import json
 import logging
+import math
+import os
 import pathlib
+import sys
+import tempfile
 import threading
 import time
+import weakref
 
 import yaml
 
 logger = logging.getLogger(__name__)
 logger.bsdev(__file__)
 
+_instances = weakref.WeakValueDictionary()  # Mappings are not hashable.
+_JSON_SCALARS = (str, int, float, bool, type(None))  # Also valid as keys.
+
+
+@atexit.register
+def _close_all():
+    """Write any pending changes before the session exits."""
+    for sdict in list(_instances.values()):
+        sdict.close()
+
+
+def _sync_agent(ref, condition):
+    """
+    Threaded task: write a StoredDict after each deadline passes.
+
+    Holds only a weak reference ('ref') to the StoredDict while no write is
+    pending, so an unused StoredDict can be collected (and this thread ends).
+    """
+    logger.debug("Starting sync_agent...")
+    while True:
+        with condition:
+            sdict = ref()
+            if sdict is None or sdict._closed:
+                return
+            if not sdict.sync_in_progress:
+                del sdict  # Idle: only the weak reference.
+                condition.wait()
+                continue
+            remaining = sdict._sync_deadline - time.time()
+            if remaining > 0:
+                condition.wait(remaining)
+                continue
+        logger.debug("Sync waiting period ended")
+        sdict._write()  # Without holding the lock.
+        del sdict
+
+
+def _wake_sync_agent(condition):
+    """Wake the sync agent (its StoredDict is gone)."""
+    with condition:
+        condition.notify_all()
+
+
+def _is_sphinx_build():
+    """Is Sphinx building the documentation (is it the outermost caller)?"""
+    frame = sys._getframe()
+    while frame.f_back is not None:
+        frame = frame.f_back
+    return "sphinx-build" in frame.f_code.co_filename
+
+
+def _check_serializable(key, value):
+    """
+    Raise TypeError if (key, value) is not JSON serializable.
+
+    Plain scalars (the most common case, such as ``scan_id``) are accepted
+    without encoding.  Anything else is checked by ``json.dumps()`` (faster
+    than a walk through nested containers in Python).
+    """
+    if type(key) in _JSON_SCALARS and type(value) in _JSON_SCALARS:
+        return
+    json.dumps({key: value})
+
 
 class StoredDict(collections.abc.MutableMapping):
     """
@@ -43,11 +113,23 @@ class StoredDict(collections.abc.MutableMapping):
     chosen long enough to allow multiple updates to the mapping before a single
     write but short enough to ensure prompt backup of the mapping.
 
+    A single writer thread (started with the first update) waits for the
+    delay period to pass, then writes.  Pending changes are written when the
+    session exits (or :meth:`close` is called).
+
+    In *journal* mode, the writer appends only the changed keys to a journal
+    file (the YAML file name plus ``.journal``), which :meth:`reload` replays
+    after reading the YAML file.  The journal is compacted (the YAML file is
+    rewritten and the journal removed) after ``compact_every`` changes, on
+    :meth:`flush`, and on :meth:`close`.
+
     .. autosummary::
 
+        ~close
         ~flush
         ~popitem
         ~reload
+        ~update
 
     .. rubric:: Static methods
 
@@ -55,13 +137,23 @@ class StoredDict(collections.abc.MutableMapping):
 
     .. autosummary::
 
+        ~append_journal
         ~dump
         ~load
+        ~load_journal
 
     ----
     """
 
-    def __init__(self, file, delay=5, title=None, serializable=True):
+    def __init__(
+        self,
+        file,
+        delay=5,
+        title=None,
+        serializable=True,
+        journal=False,
+        compact_every=100,
+    ):
         """
         StoredDict : Dictionary that syncs to storage
 
@@ -77,23 +169,48 @@ class StoredDict(collections.abc.MutableMapping):
             Default: "Written by StoredDict."
         serializable : bool
             If True, validate new dictionary entries are JSON serializable.
+        journal : bool
+            If True, append changes to a journal file instead of rewriting
+            the YAML file each time.
+            Default: False
+        compact_every : int
+            (journal mode) Compact the journal after this many changes.
+            Default: 100
         """
         self._file = pathlib.Path(file)
+        self._journal = None
+        if journal:
+            self._journal = self._file.with_name(self._file.name + ".journal")
+        self._compact_every = max(1, compact_every)
+        self._changes = []  # (journal mode) Changes not yet written.
+        self._journal_length = 0  # (journal mode) Changes in the journal.
         self._delay = max(0, delay)
         self._title = title or f"Written by {self.__class__.__name__}."
         self.test_serializable = serializable
+        # Sphinx imports the module: ignore all the objects it tries to add.
+        self._ignore_updates = _is_sphinx_build()
 
         self.sync_in_progress = False
         self._sync_deadline = time.time()
         self._sync_key = f"sync_agent_{id(self):x}"
-        self._sync_loop_period = 0.005
+        self._sync_condition = threading.Condition()
+        self._sync_thread = None
+        self._dump_lock = threading.Lock()  # One dump at a time.
+        self._closed = False
 
         self._cache = {}
         self.reload()
+        _instances[self._sync_key] = self
+        finalizer = weakref.finalize(self, _wake_sync_agent, self._sync_condition)
+        finalizer.atexit = False
 
     def __delitem__(self, key):
         """Delete dictionary value by key."""
-        del self._cache[key]
+        self._check_open()
+        with self._sync_condition:
+            del self._cache[key]
+            self._record_change(key, deleted=True)
+            self._delayed_sync_to_storage()
 
     def __getitem__(self, key):
         """Get dictionary value by key."""
@@ -113,54 +230,105 @@ class StoredDict(collections.abc.MutableMapping):
 
     def __setitem__(self, key, value):
         """Write to the dictionary."""
-        outermost_frame = inspect.getouterframes(inspect.currentframe())[-1]
-        if "sphinx-build" in outermost_frame.filename:
-            # Seems that Sphinx is building the documentation.
-            # Ignore all the objects it tries to add.
+        if self._ignore_updates:
             return
 
+        self._check_open()
         if self.test_serializable:
-            json.dumps({key: value})
+            _check_serializable(key, value)
 
-        self._cache[key] = value  # Store the new (or revised) content.
+        with self._sync_condition:
+            self._cache[key] = value  # Store the new (or revised) content.
+            self._record_change(key)
+            self._delayed_sync_to_storage()
 
-        # Reset the deadline.
-        self._sync_deadline = time.time() + self._delay
-        logger.debug("new sync deadline in %f s.", self._delay)
+    def _check_open(self):
+        """Raise ValueError if the dictionary is closed."""
+        if self._closed:
+            raise ValueError(f"StoredDict '{self._file}' is closed.")
 
-        if not self.sync_in_progress:
-            # Start the sync_agent (thread).
-            self._delayed_sync_to_storage()
+    def _record_change(self, key, deleted=False):
+        """(journal mode) Remember a change, to be appended to the journal."""
+        if self._journal is None:
+            return
+        if deleted:
+            self._changes.append({"op": "del", "key": key})
+        else:
+            self._changes.append({"op": "set", "key": key, "value": self._cache[key]})
 
     def _delayed_sync_to_storage(self):
         """
         Sync the metadata to storage.
 
-        Start a time-delay thread.  New writes to the metadata dictionary will
-        extend the deadline.  Sync once the deadline is reached.
+        (Re)set the deadline and wake the writer thread.  New writes to the
+        metadata dictionary will extend the deadline.  Sync once the deadline
+        is reached.
         """
-
-        def sync_agent():
-            """Threaded task."""
-            logger.debug("Starting sync_agent...")
+        with self._sync_condition:
+            self._sync_deadline = time.time() + self._delay
+            logger.debug("new sync deadline in %f s.", self._delay)
             self.sync_in_progress = True
-            while time.time() < self._sync_deadline:
-                time.sleep(self._sync_loop_period)
-            logger.debug("Sync waiting period ended")
-            self.sync_in_progress = False
+            if self._sync_thread is None:
+                # Not a bound method: the thread must not keep 'self' alive.
+                self._sync_thread = threading.Thread(
+                    target=_sync_agent,
+                    args=(weakref.ref(self), self._sync_condition),
+                    name=self._sync_key,
+                    daemon=True,
+                )
+                self._sync_thread.start()
+            self._sync_condition.notify()
+
+    def _write(self, compact=False):
+        """
+        Write the dictionary (a snapshot of it) to storage.
 
-            StoredDict.dump(self._file, self._cache, title=self._title)
+        In journal mode, append the changes unless the journal is long
+        enough (or 'compact' is True) to compact it.
+        """
+        with self._dump_lock:
+            with self._sync_condition:
+                self.sync_in_progress = False
+                changes, self._changes = self._changes, []
+                compact = (
+                    compact
+                    or self._journal is None
+                    or self._journal_length + len(changes) >= self._compact_every
+                    or not self._file.exists()
+                )
+                contents = dict(self._cache) if compact else None
+
+            if compact:
+                StoredDict.dump(self._file, contents, title=self._title)
+                if self._journal is not None:
+                    self._journal.unlink(missing_ok=True)
+                    self._journal_length = 0
+                    logger.debug("Compacted journal '%s'.", self._journal)
+            elif len(changes) > 0:
+                StoredDict.append_journal(self._journal, changes)
+                self._journal_length += len(changes)
+
+    def close(self):
+        """
+        Write any pending changes, then stop the writer thread.
 
-        thred = threading.Thread(target=sync_agent)
-        thred.start()
+        Later changes raise ``ValueError``.
+        """
+        with self._sync_condition:
+            pending = self.sync_in_progress or self._journal_length > 0
+            self._closed = True
+            self._sync_condition.notify()
+        if pending:
+            self._write(compact=True)
+        if self._sync_thread is not None:
+            self._sync_thread.join(timeout=1)
+        _instances.pop(self._sync_key, None)
 
     def flush(self):
-        """Force a write of the dictionary to disk"""
+        """Force a write of the dictionary to disk (compact the journal)"""
         logger.debug("flush()")
-        if not self.sync_in_progress:
-            StoredDict.dump(self._file, self._cache, title=self._title)
+        self._write(compact=True)
         self._sync_deadline = time.time()
-        self.sync_in_progress = False
 
     def popitem(self):
         """
@@ -169,22 +337,106 @@ class StoredDict(collections.abc.MutableMapping):
         Pairs are returned in LIFO (last-in, first-out) order.
         Raises KeyError if the dict is empty.
         """
-        return self._cache.popitem()
+        self._check_open()
+        with self._sync_condition:
+            key, value = self._cache.popitem()
+            self._record_change(key, deleted=True)
+            self._delayed_sync_to_storage()
+        return key, value
+
+    def update(self, other=(), /, **kwargs):
+        """
+        Update the dictionary from a mapping (or pairs) and keywords.
+
+        All new entries are validated first, then stored together with a
+        single sync.  Nothing is stored if any entry is not serializable.
+        """
+        if self._ignore_updates:
+            return
+
+        self._check_open()
+        updates = dict(other, **kwargs)
+        if len(updates) == 0:
+            return
+        if self.test_serializable:
+            for key, value in updates.items():
+                _check_serializable(key, value)
+
+        with self._sync_condition:
+            self._cache.update(updates)
+            for key in updates:
+                self._record_change(key)
+            self._delayed_sync_to_storage()
 
     def reload(self):
         """Read dictionary from storage."""
         logger.debug("reload()")
-        self._cache = StoredDict.load(self._file)
+        with self._sync_condition:
+            self._cache = StoredDict.load(self._file)
+            self._changes = []
+            if self._journal is not None:
+                changes = StoredDict.load_journal(self._journal)
+                for change in changes:
+                    if change["op"] == "del":
+                        self._cache.pop(change["key"], None)
+                    else:
+                        self._cache[change["key"]] = change["value"]
+                self._journal_length = len(changes)
 
     @staticmethod
     def dump(file, contents, title=None):
-        """Write dictionary to YAML file."""
+        """
+        Write dictionary to YAML file.
+
+        Write to a temporary file first, then replace the file.  An
+        interrupted write will not leave a truncated file.
+        """
         logger.debug("_dump(): file='%s', contents=%r, title=%r", file, contents, title)
-        with open(file, "w") as f:
-            if isinstance(title, str) and len(title) > 0:
-                f.write(f"# {title}\n")
-            f.write(f"# Dictionary contents written: {datetime.datetime.now()}\n\n")
-            f.write(yaml.dump(contents, indent=2))
+        file = pathlib.Path(file)
+        text = ""
+        if isinstance(title, str) and len(title) > 0:
+            text += f"# {title}\n"
+        text += f"# Dictionary contents written: {datetime.datetime.now()}\n\n"
+        text += yaml.dump(contents, indent=2)
+
+        mode = file.stat().st_mode & 0o777 if file.exists() else 0o644
+        fd, tmp = tempfile.mkstemp(dir=file.parent, prefix=f".{file.name}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            os.chmod(tmp, mode)
+            os.replace(tmp, file)
+        except BaseException:
+            pathlib.Path(tmp).unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def append_journal(file, changes):
+        """Append changes to the journal file (one YAML document each)."""
+        text = "".join(
+            "--- " + yaml.safe_dump(change, default_flow_style=True, width=math.inf)
+            for change in changes
+        )
+        with open(file, "a") as f:
+            f.write(text)
+
+    @staticmethod
+    def load_journal(file):
+        """
+        Read the changes from a journal file.
+
+        A change that was not completely written (the last one) is ignored.
+        """
+        file = pathlib.Path(file)
+        changes = []
+        if file.exists():
+            try:
+                for change in yaml.safe_load_all(file.read_text()):
+                    if isinstance(change, dict) and "key" in change:
+                        changes.append(change)
+            except yaml.YAMLError as reason:
+                logger.warning("Journal '%s' is incomplete: %s", file, reason)
+        return changes
 
     @staticmethod
     def load(file):